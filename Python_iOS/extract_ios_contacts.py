@@ -5,10 +5,15 @@
 
 import argparse
 import csv
+import itertools
+import operator
 import os
+import re
 import sqlite3
 import sys
-from typing import Dict, List, Optional
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Set
 
 # -------------------- cute colors --------------------
 RESET = "\x1b[0m"
@@ -51,36 +56,92 @@ def find_manifest_db(backup_dir: str) -> str:
     return candidate
 
 def open_sqlite(path: str) -> sqlite3.Connection:
-    conn = sqlite3.connect(path)
+    # Backup DBs are never written: open read-only + immutable so SQLite skips
+    # locking and journal/WAL handling, and serve pages from a memory map.
+    # immutable=1 would also ignore a -wal file, so a database with
+    # uncheckpointed WAL pages is only opened ro (same rule as utils.sqlite_ro_uri).
+    uri = Path(os.path.abspath(path)).as_uri() + "?mode=ro"
+    if not os.path.exists(path + "-wal"):
+        uri += "&immutable=1"
+    conn = sqlite3.connect(uri, uri=True)
+    conn.executescript(
+        "PRAGMA mmap_size=268435456;"
+        "PRAGMA cache_size=-65536;"
+        "PRAGMA temp_store=MEMORY;"
+        "PRAGMA query_only=1;"
+    )
     conn.row_factory = sqlite3.Row
     return conn
 
+@contextmanager
+def read_transaction(conn: sqlite3.Connection):
+    # Run a burst of reads under one shared lock / snapshot instead of an
+    # implicit transaction per statement
+    conn.execute("BEGIN")
+    try:
+        yield conn
+    finally:
+        conn.execute("COMMIT")
+
 def backup_file_path(backup_dir: str, file_id: str) -> str:
     # Files are stored as <backup_dir>/<first 2 chars>/<fileID>
     subdir = file_id[:2]
     return os.path.join(backup_dir, subdir, file_id)
 
-def find_contact_dbs(manifest_conn: sqlite3.Connection) -> List[sqlite3.Row]:
-    # Look for likely Contacts DB paths across iOS versions
-    like_patterns = [
-        "%AddressBook.sqlitedb%",
-        "%AddressBookImages.sqlitedb%",
-        "%Application Support/AddressBook/%",
-        "%Contacts%.sqlite%",
-    ]
-    rows: List[sqlite3.Row] = []
-    for pat in like_patterns:
-        rows += manifest_conn.execute("""
+# Every CONTACT_PATH_PATTERNS entry contains one of these substrings. They are
+# cheap to reject on most Manifest rows and narrow Files before the full match.
+_CONTACT_PATH_HINTS = ("%ook%", "%ontact%")
+
+# Likely Contacts DB paths across iOS versions
+CONTACT_PATH_PATTERNS = (
+    "%AddressBook.sqlitedb%",
+    "%AddressBookImages.sqlitedb%",
+    "%Application Support/AddressBook/%",
+    "%Contacts%.sqlite%",
+)
+
+# Prefer AddressBook/Contacts DBs over images or auxiliary files; deeper paths
+# win ties (each '/' adds a point)
+_CONTACT_DB_SCORE = """
+    (CASE WHEN instr(lower(relativePath), 'addressbook.sqlitedb') > 0
+            OR instr(lower(relativePath), 'contacts') > 0 THEN 10 ELSE 0 END)
+  + (CASE WHEN instr(lower(relativePath), 'images') > 0 THEN -5 ELSE 0 END)
+  + (CASE WHEN instr(lower(relativePath), 'application support/addressbook') > 0 THEN 5 ELSE 0 END)
+  + (length(relativePath) - length(replace(relativePath, '/', '')))
+"""
+
+def _select_contact_dbs(manifest_conn: sqlite3.Connection, columns: str, tail: str = "") -> sqlite3.Cursor:
+    # Single scan over Files: the CTE narrows rows with the two broad hints,
+    # the full patterns only run on survivors, and GROUP BY dedupes by fileID.
+    # (A CTE rather than a temp table: connections are query_only.)
+    hints = " OR ".join("relativePath LIKE ?" for _ in _CONTACT_PATH_HINTS)
+    where = " OR ".join("relativePath LIKE ?" for _ in CONTACT_PATH_PATTERNS)
+    return manifest_conn.execute(f"""
+        WITH narrowed AS (
             SELECT fileID, domain, relativePath
             FROM Files
-            WHERE relativePath LIKE ?
-        """, (pat,)).fetchall()
-    # Deduplicate by fileID
-    seen = set(); unique = []
-    for r in rows:
-        if r["fileID"] not in seen:
-            unique.append(r); seen.add(r["fileID"])
-    return unique
+            WHERE {hints}
+        )
+        SELECT {columns}
+        FROM narrowed
+        WHERE {where}
+        GROUP BY fileID
+        {tail}
+    """, _CONTACT_PATH_HINTS + CONTACT_PATH_PATTERNS)
+
+def find_contact_dbs(manifest_conn: sqlite3.Connection) -> List[sqlite3.Row]:
+    return _select_contact_dbs(manifest_conn, "fileID, domain, relativePath").fetchall()
+
+FETCH_BATCH = 1000  # rows per fetchmany() on the high-volume cursors
+
+def raw_cursor(conn: sqlite3.Connection) -> sqlite3.Cursor:
+    # Plain-tuple rows for high-volume scans; sqlite3.Row stays on the
+    # connection for the small schema/introspection queries. Callers iterate
+    # these cursors directly (never fetchall) so the table is not materialized.
+    cur = conn.cursor()
+    cur.row_factory = None
+    cur.arraysize = FETCH_BATCH
+    return cur
 
 def table_exists(conn: sqlite3.Connection, name: str) -> bool:
     row = conn.execute(
@@ -89,107 +150,90 @@ def table_exists(conn: sqlite3.Connection, name: str) -> bool:
     return row is not None
 
 # ---------- Legacy AddressBook schema ----------
-def load_contacts_from_ab_schema(conn: sqlite3.Connection) -> List[Dict]:
+# Unlabelled values with at least seven digits are treated as phone numbers.
+# \D and \d never overlap, so the anchored match is a single linear scan.
+_PHONE_LIKE = re.compile(r"(?:\D*\d){7}")
+
+# ABMultiValue.property codes that identify the kind outright; anything else
+# is classified from its label text
+_PROP_KIND = {1: "E", 3: "P", 4: "E", 6: "A", 7: "P"}
+
+# Space, \t, \n, \v, \f, \r as a SQLite expression for trim()'s second argument
+_SQL_WS = "' ' || char(9, 10, 11, 12, 13)"
+
+def load_contacts_from_ab_schema(conn: sqlite3.Connection) -> Iterator[Dict]:
     info("Detected legacy AB schema")
-    contacts = []
 
-    try:
-        persons = conn.execute("""
-            SELECT ROWID as id, First, Last, Middle, Organization, Note
-            FROM ABPerson
-        """).fetchall()
-    except sqlite3.DatabaseError:
-        persons = conn.execute("""
-            SELECT ROWID as id, First, Last, Middle, Organization, Note
-            FROM abperson
-        """).fetchall()
-
-    # ABMultiValueLabel: map numeric label ids -> text
-    label_map: Dict[int, str] = {}
+    # ABMultiValueLabel holds label text referenced by numeric ABMultiValue.label ids;
+    # some schemas store the label text inline instead, so fall back to mv.label.
+    label_text = "NULL"
     if table_exists(conn, "ABMultiValueLabel"):
         try:
             cols = {r["name"].lower() for r in conn.execute("PRAGMA table_info(ABMultiValueLabel)")}
             label_col = "label" if "label" in cols else ("value" if "value" in cols else None)
             if label_col:
-                for r in conn.execute(f"SELECT ROWID as id, {label_col} as txt FROM ABMultiValueLabel"):
-                    if r["id"] is not None and r["txt"] is not None:
-                        label_map[int(r["id"])] = str(r["txt"])
+                label_text = f"(SELECT l.{label_col} FROM ABMultiValueLabel l WHERE l.ROWID = mv.label)"
         except sqlite3.DatabaseError:
             pass
 
-    mv_rows = conn.execute("""
-        SELECT record_id, property, value, label
-        FROM ABMultiValue
-    """).fetchall()
-
-    from collections import defaultdict
-    phones = defaultdict(list)
-    emails = defaultdict(list)
-    addresses = defaultdict(list)
-    urls = defaultdict(list)
-
-    def norm_label(raw) -> str:
-        if raw is None:
-            return ""
-        try:
-            if isinstance(raw, int):
-                return label_map.get(raw, str(raw)).strip().lower()
-            s = str(raw)
-            return s.strip().lower()
-        except Exception:
-            return ""
-
-    for r in mv_rows:
-        rid = r["record_id"]
-        val = r["value"]
-        if val is None:
-            continue
-        label = norm_label(r["label"])
-        prop = r["property"]
-
-        is_phone = ("phone" in label) or ("mobile" in label) or ("cell" in label) or prop in (3, 7)
-        is_email = ("email" in label) or ("e-mail" in label) or prop in (1, 4)
-        is_addr  = ("address" in label) or prop == 6
-        is_url   = ("url" in label) or ("homepage" in label)
-
-        if not (is_phone or is_email or is_addr or is_url):
-            if isinstance(val, str):
-                if "@" in val:
-                    is_email = True
-                elif sum(ch.isdigit() for ch in val) >= 7:
-                    is_phone = True
-
-        sval = str(val).strip()
-        if not sval:
-            continue
-
-        if is_phone:
-            phones[rid].append(sval)
-        elif is_email:
-            emails[rid].append(sval)
-        elif is_addr:
-            addresses[rid].append(sval)
-        elif is_url:
-            urls[rid].append(sval)
-
-    for p in persons:
-        contacts.append({
-            "id": p["id"],
-            "first": p["First"] or "",
-            "middle": p["Middle"] or "",
-            "last": p["Last"] or "",
-            "org": p["Organization"] or "",
-            "note": p["Note"] or "",
-            "phones": phones.get(p["id"], []),
-            "emails": emails.get(p["id"], []),
-            "addresses": addresses.get(p["id"], []),
-            "urls": urls.get(p["id"], []),
-        })
-
-    return contacts
+    # One ordered pass: each person joined to its multi-values, classified by
+    # SQLite into kind P=phone, E=email, A=address, U=url. Known property codes
+    # dispatch on an integer compare; only the rest resolve their label, once
+    # per row, inside the ELSE branch. Unlabelled non-text values (kind '-')
+    # are skipped; text that matches nothing comes back with kind NULL for the
+    # digit heuristic below.
+    prop_kind = " ".join(f"WHEN {prop} THEN '{kind}'" for prop, kind in _PROP_KIND.items())
+    # trim() alone only strips spaces; match str.strip() on ASCII whitespace
+    value = f"trim(mv.value, {_SQL_WS})"
+    cur = raw_cursor(conn)
+    cur.execute(f"""
+        SELECT p.ROWID AS id, p.First, p.Last, p.Middle, p.Organization, p.Note,
+            {value} AS value,
+            CASE mv.property {prop_kind} ELSE (
+                SELECT CASE
+                    WHEN lbl LIKE '%phone%' OR lbl LIKE '%mobile%' OR lbl LIKE '%cell%' THEN 'P'
+                    WHEN lbl LIKE '%email%' OR lbl LIKE '%e-mail%' THEN 'E'
+                    WHEN lbl LIKE '%address%' THEN 'A'
+                    WHEN lbl LIKE '%url%' OR lbl LIKE '%homepage%' THEN 'U'
+                    WHEN typeof(mv.value) <> 'text' THEN '-'
+                    WHEN instr(mv.value, '@') > 0 THEN 'E'
+                END
+                FROM (SELECT lower(COALESCE({label_text}, mv.label, '')) AS lbl)
+            ) END AS kind
+        FROM ABPerson p
+        LEFT JOIN ABMultiValue mv
+            ON mv.record_id = p.ROWID AND mv.value IS NOT NULL AND {value} <> ''
+        ORDER BY p.ROWID, mv.ROWID
+    """)
+
+    for pid, rows in itertools.groupby(cur, key=operator.itemgetter(0)):
+        found: Dict[str, List[str]] = {"P": [], "E": [], "A": [], "U": []}
+        for _, first, last, middle, org, note, val, kind in rows:
+            if val is None:  # person without multi-values
+                continue
+            if kind is None:
+                if not _PHONE_LIKE.match(val):
+                    continue
+                kind = "P"
+            elif kind == "-":
+                continue
+            found[kind].append(val)
+        # person columns repeat on every joined row; these are from the last one
+        yield {
+            "id": pid,
+            "first": first or "",
+            "middle": middle or "",
+            "last": last or "",
+            "org": org or "",
+            "note": note or "",
+            "phones": found["P"],
+            "emails": found["E"],
+            "addresses": found["A"],
+            "urls": found["U"],
+        }
 
 # ---------- Newer Core Data Z* schema ----------
-def load_contacts_from_coredata_schema(conn: sqlite3.Connection) -> List[Dict]:
+def load_contacts_from_coredata_schema(conn: sqlite3.Connection) -> Iterator[Dict]:
     info("Detected Core Data Z* schema")
 
     candidate_person_tables = ["ZABCDRECORD", "ZCONTACT", "ZPERSON", "ZABPERSON"]
@@ -197,8 +241,16 @@ def load_contacts_from_coredata_schema(conn: sqlite3.Connection) -> List[Dict]:
     if not person_table:
         raise RuntimeError("Could not find person table in Core Data schema")
 
+    # PRAGMA table_info re-reads the schema on every call; fetch each table once
+    table_cols: Dict[str, Set[str]] = {}
+
+    def cols_of(tbl: str) -> Set[str]:
+        if tbl not in table_cols:
+            table_cols[tbl] = {r["name"] for r in conn.execute(f"PRAGMA table_info({tbl})")}
+        return table_cols[tbl]
+
     def pick_col(cands: List[str]) -> Optional[str]:
-        cols = {r["name"] for r in conn.execute(f"PRAGMA table_info({person_table})")}
+        cols = cols_of(person_table)
         for c in cands:
             if c in cols:
                 return c
@@ -220,8 +272,6 @@ def load_contacts_from_coredata_schema(conn: sqlite3.Connection) -> List[Dict]:
     base += f", {col_del} as is_deleted" if col_del else ", 0 as is_deleted"
     base += f" FROM {person_table}"
 
-    persons = conn.execute(base).fetchall()
-
     map_defs = [
         ("phones",   ["ZABCDPHONENUMBER", "ZPHONE", "ZABPHONE"], ["ZOWNER", "ZCONTACT", "ZPERSON"], ["ZFULLNUMBER", "ZVALUE", "ZPHONENUMBER"]),
         ("emails",   ["ZABCDEMAILADDRESS", "ZEMAIL", "ZABEMAIL"], ["ZOWNER", "ZCONTACT", "ZPERSON"], ["ZADDRESS", "ZVALUE", "ZEMAIL"]),
@@ -229,129 +279,170 @@ def load_contacts_from_coredata_schema(conn: sqlite3.Connection) -> List[Dict]:
         ("urls",     ["ZABCDURLADDRESS","ZURLADDRESS","ZURL"], ["ZOWNER", "ZCONTACT", "ZPERSON"], ["ZURL", "ZVALUE"]),
     ]
 
-    from collections import defaultdict
-    child_maps: Dict[str, Dict[int, List[str]]] = {k: defaultdict(list) for k, *_ in map_defs}
+    child_maps: Dict[str, Dict[int, List[str]]] = {k: {} for k, *_ in map_defs}
 
     def locate_child(tbls, owners, values):
         for t in tbls:
-            if table_exists(conn, t):
-                cols = {r["name"] for r in conn.execute(f"PRAGMA table_info({t})")}
-                o = next((c for c in owners if c in cols), None)
-                v = next((c for c in values if c in cols), None)
-                if o and v:
-                    return t, o, v
+            cols = cols_of(t)  # empty for tables that don't exist
+            o = next((c for c in owners if c in cols), None)
+            v = next((c for c in values if c in cols), None)
+            if o and v:
+                return t, o, v
         return None, None, None
 
     for key, tbls, owners, values in map_defs:
         t, o, v = locate_child(tbls, owners, values)
         if t and o and v:
-            for r in conn.execute(f"SELECT {o} as owner, {v} as value FROM {t}"):
-                if r["value"] is not None:
-                    child_maps[key][r["owner"]].append(str(r["value"]))
+            # Sorted by owner so each owner's values arrive as one contiguous group
+            cur = raw_cursor(conn)
+            cur.execute(f"SELECT {o}, {v} FROM {t} WHERE {v} IS NOT NULL ORDER BY {o}, ROWID")
+            for owner, grp in itertools.groupby(cur, key=operator.itemgetter(0)):
+                child_maps[key][owner] = [str(r[1]) for r in grp]
         else:
             info(f"[warn] Could not find child table for {key}; skipping")
 
-    contacts = []
-    for p in persons:
-        if p["is_deleted"]:
+    # Bound pop() per child map: one hash per kind per person, and each list is
+    # released from the map as soon as its contact is handed out
+    phones_pop = child_maps["phones"].pop
+    emails_pop = child_maps["emails"].pop
+    addresses_pop = child_maps["addresses"].pop
+    urls_pop = child_maps["urls"].pop
+
+    cur = raw_cursor(conn)
+    for pid, first, last, middle, org, note, is_deleted in cur.execute(base):
+        if is_deleted:
             continue
-        pid = p["id"]
-        contacts.append({
+        yield {
             "id": pid,
-            "first": p["first"] or "",
-            "middle": p["middle"] or "",
-            "last": p["last"] or "",
-            "org": p["org"] or "",
-            "note": p["note"] or "",
-            "phones": child_maps["phones"].get(pid, []),
-            "emails": child_maps["emails"].get(pid, []),
-            "addresses": child_maps["addresses"].get(pid, []),
-            "urls": child_maps["urls"].get(pid, []),
-        })
-    return contacts
-
-def read_contacts_from_db(db_path: str) -> List[Dict]:
+            "first": first or "",
+            "middle": middle or "",
+            "last": last or "",
+            "org": org or "",
+            "note": note or "",
+            "phones": phones_pop(pid, []),
+            "emails": emails_pop(pid, []),
+            "addresses": addresses_pop(pid, []),
+            "urls": urls_pop(pid, []),
+        }
+
+def read_contacts_from_db(db_path: str) -> Iterator[Dict]:
+    # Generator: contacts stream out one at a time while the DB stays open
     info(f"Reading contacts DB: {db_path}")
     conn = open_sqlite(db_path)
     try:
-        if table_exists(conn, "ABPerson") or table_exists(conn, "abperson"):
-            return load_contacts_from_ab_schema(conn)
-        return load_contacts_from_coredata_schema(conn)
+        with read_transaction(conn):
+            if table_exists(conn, "ABPerson") or table_exists(conn, "abperson"):
+                yield from load_contacts_from_ab_schema(conn)
+            else:
+                yield from load_contacts_from_coredata_schema(conn)
     finally:
         conn.close()
 
 # -------------------- outputs --------------------
-def export_csv(contacts: List[Dict], path: str):
-    info(f"Writing CSV: {path}")
+WRITE_BUFFER = 1024 * 1024  # 1 MiB: flush exports in large chunks, not per line
+
+CSV_COLS = ["first", "middle", "last", "org", "phones", "emails", "addresses", "urls", "note"]
+
+def _ensure_parent(path: str):
     folder = os.path.dirname(os.path.abspath(path))
     if folder and not os.path.exists(folder):
         os.makedirs(folder, exist_ok=True)
-    cols = ["first", "middle", "last", "org", "phones", "emails", "addresses", "urls", "note"]
-    with open(path, "w", newline="", encoding="utf-8") as f:
-        w = csv.DictWriter(f, fieldnames=cols)
-        w.writeheader()
-        for c in contacts:
-            row = {k: c.get(k, "") for k in cols}
-            for k in ["phones", "emails", "addresses", "urls"]:
-                row[k] = " | ".join(c.get(k, []))
-            w.writerow(row)
+
+_join_values = " | ".join
+
+def _csv_row(c: Dict) -> tuple:
+    # Positional, in CSV_COLS order
+    return (
+        c.get("first", ""),
+        c.get("middle", ""),
+        c.get("last", ""),
+        c.get("org", ""),
+        _join_values(c.get("phones", [])),
+        _join_values(c.get("emails", [])),
+        _join_values(c.get("addresses", [])),
+        _join_values(c.get("urls", [])),
+        c.get("note", ""),
+    )
+
+# Single-pass escape table: \ ; , and newline are all single characters
+_VCARD_ESCAPES = str.maketrans({"\\": "\\\\", ";": r"\;", ",": r"\,", "\n": r"\n"})
 
 def vcard_escape(s: str) -> str:
-    return (s or "").replace("\\", "\\\\").replace(";", r"\;").replace(",", r"\,").replace("\n", r"\n")
+    return (s or "").translate(_VCARD_ESCAPES)
+
+# Every card has the same shape; only the optional blocks vary, and those
+# are rendered to "" when empty so a card is a single format() call
+_VCARD_TEMPLATE = (
+    "BEGIN:VCARD\nVERSION:3.0\n"
+    "N:{last};{first};{middle};;\n"
+    "FN:{fn}\n"
+    "{org}{phones}{emails}{urls}{note}{addresses}"
+    "END:VCARD\n"
+)
+
+def _vcard(c: Dict) -> str:
+    first = vcard_escape(c.get("first",""))
+    last  = vcard_escape(c.get("last",""))
+    middle = vcard_escape(c.get("middle",""))
+    org   = vcard_escape(c.get("org",""))
+    note  = vcard_escape(c.get("note",""))
+    return _VCARD_TEMPLATE.format(
+        first=first,
+        last=last,
+        middle=middle,
+        fn=" ".join([x for x in [first, middle, last] if x]).strip(),
+        org=f"ORG:{org}\n" if org else "",
+        phones="".join([f"TEL;TYPE=CELL:{p}\n" for p in c.get("phones", [])]),
+        emails="".join([f"EMAIL;TYPE=INTERNET:{e}\n" for e in c.get("emails", [])]),
+        urls="".join([f"URL:{u}\n" for u in c.get("urls", [])]),
+        note=f"NOTE:{note}\n" if note else "",
+        addresses="".join([f"ITEM1.ADR;TYPE=HOME:;;;;;;{vcard_escape(a)}\n" for a in c.get("addresses", [])]),
+    )
+
+def export_csv(contacts: Iterable[Dict], path: str):
+    info(f"Writing CSV: {path}")
+    _ensure_parent(path)
+    with open(path, "w", newline="", encoding="utf-8", buffering=WRITE_BUFFER) as f:
+        w = csv.writer(f)
+        w.writerow(CSV_COLS)
+        w.writerows(map(_csv_row, contacts))
 
-def export_vcf(contacts: List[Dict], path: str):
+def export_vcf(contacts: Iterable[Dict], path: str):
     info(f"Writing VCF: {path}")
-    folder = os.path.dirname(os.path.abspath(path))
-    if folder and not os.path.exists(folder):
-        os.makedirs(folder, exist_ok=True)
-    with open(path, "w", encoding="utf-8") as f:
+    _ensure_parent(path)
+    with open(path, "w", encoding="utf-8", buffering=WRITE_BUFFER) as f:
+        for c in contacts:
+            f.write(_vcard(c))
+
+def export_contacts(contacts: Iterable[Dict], csv_path: str, vcf_path: str) -> int:
+    # One pass over the stream feeding both files, so no contact is held
+    # longer than it takes to write it. Returns the number written.
+    info(f"Writing CSV: {csv_path}")
+    info(f"Writing VCF: {vcf_path}")
+    _ensure_parent(csv_path)
+    _ensure_parent(vcf_path)
+    count = 0
+    with open(csv_path, "w", newline="", encoding="utf-8", buffering=WRITE_BUFFER) as fc, \
+         open(vcf_path, "w", encoding="utf-8", buffering=WRITE_BUFFER) as fv:
+        w = csv.writer(fc)
+        w.writerow(CSV_COLS)
         for c in contacts:
-            first = vcard_escape(c.get("first",""))
-            last  = vcard_escape(c.get("last",""))
-            middle = vcard_escape(c.get("middle",""))
-            org   = vcard_escape(c.get("org",""))
-            note  = vcard_escape(c.get("note",""))
-            fn = " ".join([x for x in [first, middle, last] if x]).strip()
-            f.write("BEGIN:VCARD\n")
-            f.write("VERSION:3.0\n")
-            f.write(f"N:{last};{first};{middle};;\n")
-            f.write(f"FN:{fn}\n")
-            if org:
-                f.write(f"ORG:{org}\n")
-            for p in c.get("phones", []):
-                f.write(f"TEL;TYPE=CELL:{p}\n")
-            for e in c.get("emails", []):
-                f.write(f"EMAIL;TYPE=INTERNET:{e}\n")
-            for u in c.get("urls", []):
-                f.write(f"URL:{u}\n")
-            if note:
-                f.write(f"NOTE:{note}\n")
-            for a in c.get("addresses", []):
-                f.write(f"ITEM1.ADR;TYPE=HOME:;;;;;;{vcard_escape(a)}\n")
-            f.write("END:VCARD\n")
+            w.writerow(_csv_row(c))
+            fv.write(_vcard(c))
+            count += 1
+    return count
 
 # -------------------- manifest pick & CLI --------------------
 def pick_best_contacts_db(backup_dir: str, manifest_conn: sqlite3.Connection) -> Optional[str]:
-    candidates = find_contact_dbs(manifest_conn)
-    if not candidates:
+    # SQLite scores the candidates and hands back only the winner
+    best = _select_contact_dbs(
+        manifest_conn,
+        f"fileID, domain, relativePath, {_CONTACT_DB_SCORE} AS score",
+        "ORDER BY score DESC, fileID LIMIT 1",
+    ).fetchone()
+    if best is None:
         return None
 
-    # Prefer AddressBook/Contacts DB over images or auxiliary files
-    priorities = []
-    for r in candidates:
-        rp = (r["relativePath"] or "").lower()
-        score = 0
-        if "addressbook.sqlitedb" in rp or "contacts" in rp:
-            score += 10
-        if "images" in rp:
-            score -= 5
-        if "application support/addressbook" in rp:
-            score += 5
-        score += rp.count("/")
-        priorities.append((score, r))
-
-    priorities.sort(key=lambda x: x[0], reverse=True)
-    best = priorities[0][1]
     db_path = backup_file_path(backup_dir, best["fileID"])
     if not os.path.isfile(db_path):
         error(f"Expected DB file missing: {db_path}")
@@ -384,7 +475,8 @@ def main():
 
     conn = open_sqlite(manifest_path)
     try:
-        db_path = pick_best_contacts_db(backup_dir, conn)
+        with read_transaction(conn):
+            db_path = pick_best_contacts_db(backup_dir, conn)
     finally:
         conn.close()
 
@@ -392,17 +484,14 @@ def main():
         error("Could not locate a contacts database in Manifest.db. Is this the correct backup (and unencrypted)?")
         sys.exit(1)
 
-    contacts = read_contacts_from_db(db_path)
-    info(f"Found {len(contacts)} contacts")
-
-    # Ensure output directory exists and write files
-    export_csv(contacts, args.csv)
-    export_vcf(contacts, args.vcf)
+    # Stream contacts from the DB straight into both output files
+    total = export_contacts(read_contacts_from_db(db_path), args.csv, args.vcf)
+    info(f"Found {total} contacts")
 
     # Fun, colorful outro
     pet = _color("Python", TEAL)
     brand = _color("theProject.", MAGENTA + BOLD)
-    count = _color(str(len(contacts)), TEAL + BOLD)
+    count = _color(str(total), TEAL + BOLD)
     path_colored = _color(outdir, MAGENTA)
 
     print()
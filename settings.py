@@ -4,28 +4,44 @@ from pathlib import Path
 VERSION = "0.2.0"
 
 # Candidate database/dir names we scan for inside MobileSync backup trees
-CONTACT_DB_CANDIDATES = [
+# (tuples: fixed at import; finders freeze them into sets for lookups)
+CONTACT_DB_CANDIDATES = (
     "AddressBook.sqlitedb",     # very old iOS
     "AddressBook.sqlitedb-wal",
     "Contacts2.sqlite",         # some mac backups
     "Contacts.sqlite",          # modern
-]
+)
 
-SMS_DB_CANDIDATES = [
+SMS_DB_CANDIDATES = (
     "sms.db",
     "chat.db",                  # rare variant
-]
+)
 
-NOTES_DB_CANDIDATES = [
+NOTES_DB_CANDIDATES = (
     "notes.sqlite",
     "NoteStore.sqlite",
-]
+)
 
-CAL_DB_CANDIDATES = [
+CAL_DB_CANDIDATES = (
     "Calendar.sqlite",
-]
+)
 
-PHOTO_EXTS = {".jpg", ".jpeg", ".png", ".gif", ".heic", ".heif", ".tif", ".tiff", ".mov", ".mp4"}
+# Where those live in an iTunes/Finder backup, as Manifest.db (domain, relativePath);
+# looked up before falling back to a walk
+SMS_DB_BACKUP_PATHS = (
+    ("HomeDomain", "Library/SMS/sms.db"),
+)
+
+NOTES_DB_BACKUP_PATHS = (
+    ("AppDomainGroup-group.com.apple.notes", "NoteStore.sqlite"),   # iOS 9+
+    ("HomeDomain", "Library/Notes/notes.sqlite"),                   # older iOS
+)
+
+KEYCHAIN_BACKUP_PATHS = (
+    ("KeychainDomain", "keychain-backup.plist"),
+)
+
+PHOTO_EXTS = frozenset({".jpg", ".jpeg", ".png", ".gif", ".heic", ".heif", ".tif", ".tiff", ".mov", ".mp4"})
 
 DEFAULT_OUTPUT_FORMATS = {"csv", "json", "html"}
 
@@ -0,0 +1,50 @@
+import os
+
+from tools.attachment_manager import safe_copy_by_basename, safe_copy_many
+from utils import scan_backup
+
+
+def make_source(root):
+    files = {"a/IMG_1.jpg": b"one", "b/IMG_1.jpg": b"other", "b/c/clip.mov": b"\x00" * 70000, "d/empty.txt": b""}
+    for rel, data in files.items():
+        p = root / rel
+        p.parent.mkdir(parents=True, exist_ok=True)
+        p.write_bytes(data)
+        os.utime(p, ns=(1_600_000_000_000_000_000, 1_600_000_000_123_456_789))
+    return files
+
+
+def test_safe_copy_many_matches_single_copies(tmp_path):
+    src = tmp_path / "src"
+    files = make_source(src)
+    copied = safe_copy_many(str(src), ["IMG_1.jpg", "clip.mov", "empty.txt", "missing.heic"], str(tmp_path / "many"))
+    assert set(copied) == {"IMG_1.jpg", "clip.mov", "empty.txt"}
+    for name, dst in copied.items():
+        single = safe_copy_by_basename(str(src), name, str(tmp_path / "one"))
+        assert os.path.relpath(dst, tmp_path / "many") == os.path.relpath(single, tmp_path / "one")
+        rel = os.path.relpath(dst, tmp_path / "many").replace(os.sep, "/")
+        with open(dst, "rb") as f:
+            assert f.read() == files[rel]
+        assert os.stat(dst).st_mtime_ns == 1_600_000_000_123_456_789
+    assert safe_copy_many(str(src), [], str(tmp_path / "none")) == {}
+
+
+def test_safe_copy_many_from_scan_matches_walk(tmp_path):
+    src = tmp_path / "src"
+    make_source(src)
+    names = ["IMG_1.jpg", "img_1.jpg", "clip.mov", "missing.heic"]
+    walked = safe_copy_many(str(src), names, str(tmp_path / "walk"))
+    scanned = safe_copy_many(str(src), names, str(tmp_path / "scan"), scan=scan_backup(str(src), refresh=True))
+    assert set(scanned) == set(walked) == {"IMG_1.jpg", "clip.mov"}
+    for name in walked:
+        assert os.path.relpath(scanned[name], tmp_path / "scan") == os.path.relpath(walked[name], tmp_path / "walk")
+
+
+def test_safe_copy_falls_back_when_copy_file_range_copies_nothing(tmp_path, monkeypatch):
+    # procfs/FUSE/NFS can answer 0 on the first call for a non-empty file
+    src = tmp_path / "src"
+    make_source(src)
+    monkeypatch.setattr(os, "copy_file_range", lambda *a, **k: 0, raising=False)
+    dst = safe_copy_by_basename(str(src), "clip.mov", str(tmp_path / "out"))
+    with open(dst, "rb") as f:
+        assert f.read() == b"\x00" * 70000
@@ -0,0 +1,34 @@
+import json
+import sqlite3
+from pathlib import Path
+
+from tools.calendar_parser import extract_calendar
+
+
+def make_calendar_db(path: Path) -> None:
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE Calendar (ROWID INTEGER PRIMARY KEY, title TEXT)")
+    conn.execute("CREATE TABLE Event (ROWID INTEGER PRIMARY KEY, summary TEXT, description TEXT, start_date REAL, end_date REAL, calendar_id INTEGER)")
+    conn.execute("INSERT INTO Calendar VALUES (1, 'Work')")
+    conn.executemany(
+        "INSERT INTO Event VALUES (?, ?, ?, ?, ?, ?)",
+        [
+            (1, "Standup", "daily", 700000000.5, 700000900.0, 1),
+            (2, "No end", None, 0, None, None),
+        ],
+    )
+    conn.commit()
+    conn.close()
+
+
+def test_extract_calendar_exports_events(tmp_path):
+    src = tmp_path / "src"
+    src.mkdir()
+    make_calendar_db(src / "Calendar.sqlite")
+    assert extract_calendar(str(src), str(tmp_path / "out")) == 2
+    events = json.loads((tmp_path / "out" / "calendar.json").read_text(encoding="utf-8"))
+    assert events[0]["start"] == "2023-03-08T20:26:40.500000+00:00"
+    assert events[0]["end"] == "2023-03-08T20:41:40+00:00"
+    assert events[0]["calendar"] == "Work"
+    assert events[1]["start"] == "2001-01-01T00:00:00+00:00" and events[1]["end"] is None
+    assert (tmp_path / "out" / "calendar.html").exists()
@@ -0,0 +1,69 @@
+import json
+import sqlite3
+from pathlib import Path
+
+from tools.contact_parser import extract_contacts
+
+
+def make_ab(path: Path) -> None:
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE ABPerson (ROWID INTEGER PRIMARY KEY, First TEXT, Last TEXT, Organization TEXT)")
+    conn.execute("CREATE TABLE ABMultiValue (UID INTEGER PRIMARY KEY, record_id INTEGER, property INTEGER, label INTEGER, value TEXT)")
+    conn.execute("INSERT INTO ABPerson VALUES (1, 'Ada', 'Lovelace', 'Engines'), (2, 'Alan', 'Turing', NULL)")
+    conn.executemany(
+        "INSERT INTO ABMultiValue (record_id, property, value) VALUES (?, ?, ?)",
+        [(1, 3, "555-0100"), (1, 4, "ada@example.com"), (1, 3, "555-0101"), (2, 5, "somewhere")],
+    )
+    conn.commit()
+    conn.close()
+
+
+def make_znames(path: Path) -> None:
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE ZABCDRECORD (Z_PK INTEGER PRIMARY KEY, ZFIRSTNAME TEXT, ZLASTNAME TEXT, ZORGANIZATION TEXT)")
+    conn.execute("CREATE TABLE ZABCDPHONENUMBER (Z_PK INTEGER PRIMARY KEY, ZOWNER INTEGER, ZFULLNUMBER TEXT)")
+    conn.execute("CREATE TABLE ZABCDEMAILADDRESS (Z_PK INTEGER PRIMARY KEY, ZOWNER INTEGER, ZADDRESS TEXT)")
+    conn.execute("INSERT INTO ZABCDRECORD VALUES (1, 'Grace', 'Hopper', 'Navy'), (2, 'Linus', NULL, NULL)")
+    conn.executemany("INSERT INTO ZABCDPHONENUMBER (ZOWNER, ZFULLNUMBER) VALUES (?, ?)", [(1, "11"), (2, "22"), (1, "12")])
+    conn.execute("INSERT INTO ZABCDEMAILADDRESS (ZOWNER, ZADDRESS) VALUES (1, 'grace@example.com')")
+    conn.commit()
+    conn.close()
+
+
+def test_extract_contacts_legacy_addressbook(tmp_path):
+    src = tmp_path / "src" / "Library" / "AddressBook"
+    src.mkdir(parents=True)
+    make_ab(src / "AddressBook.sqlitedb")
+    rows = extract_contacts(str(tmp_path / "src"), str(tmp_path / "out"))
+    assert [r["first"] for r in rows] == ["Ada", "Alan"]
+    assert rows[0]["phones"] == "555-0100, 555-0101"
+    assert rows[0]["emails"] == "ada@example.com"
+    assert rows[1]["phones"] == "" and rows[1]["organization"] is None
+    people = json.loads((tmp_path / "out" / "contacts.json").read_text(encoding="utf-8"))
+    assert people[0]["phones"] == ["555-0100", "555-0101"]
+    assert (tmp_path / "out" / "contacts.csv").read_text(encoding="utf-8").startswith("id,first,last,organization,phones,emails")
+
+
+def test_extract_contacts_coredata_schema(tmp_path):
+    src = tmp_path / "src"
+    src.mkdir()
+    make_znames(src / "Contacts.sqlite")
+    rows = extract_contacts(str(src), str(tmp_path / "out"))
+    by_id = {r["id"]: r for r in rows}
+    assert by_id[1]["phones"] == "11, 12"
+    assert by_id[1]["emails"] == "grace@example.com"
+    assert by_id[2]["phones"] == "22" and by_id[2]["emails"] == ""
+
+
+def test_extract_contacts_without_email_table(tmp_path):
+    src = tmp_path / "src"
+    src.mkdir()
+    conn = sqlite3.connect(src / "Contacts.sqlite")
+    conn.execute("CREATE TABLE ZABCDRECORD (Z_PK INTEGER PRIMARY KEY, ZFIRSTNAME TEXT, ZLASTNAME TEXT, ZORGANIZATION TEXT)")
+    conn.execute("CREATE TABLE ZABCDPHONENUMBER (Z_PK INTEGER PRIMARY KEY, ZOWNER INTEGER, ZFULLNUMBER TEXT)")
+    conn.execute("INSERT INTO ZABCDRECORD VALUES (1, 'Grace', 'Hopper', NULL)")
+    conn.executemany("INSERT INTO ZABCDPHONENUMBER (ZOWNER, ZFULLNUMBER) VALUES (?, ?)", [(1, "b|2"), (1, None), (1, "a")])
+    conn.commit()
+    conn.close()
+    rows = extract_contacts(str(src), str(tmp_path / "out"))
+    assert rows[0]["phones"] == "b|2, a" and rows[0]["emails"] == ""
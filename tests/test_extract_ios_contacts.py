@@ -0,0 +1,175 @@
+import sqlite3
+from pathlib import Path
+
+from Python_iOS.extract_ios_contacts import export_csv, export_vcf, main, open_sqlite, pick_best_contacts_db, read_contacts_from_db
+
+
+def make_ab_db(path: Path) -> None:
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE ABPerson (ROWID INTEGER PRIMARY KEY, First TEXT, Last TEXT, Middle TEXT, Organization TEXT, Note TEXT)")
+    conn.execute("CREATE TABLE ABMultiValue (UID INTEGER PRIMARY KEY, record_id INTEGER, property INTEGER, identifier INTEGER, label INTEGER, value TEXT)")
+    conn.execute("CREATE TABLE ABMultiValueLabel (value TEXT)")
+    conn.execute("INSERT INTO ABMultiValueLabel (ROWID, value) VALUES (1, '_$!<Mobile>!$_'), (2, '_$!<HomePage>!$_')")
+    conn.execute("INSERT INTO ABPerson VALUES (1, 'Ada', 'Lovelace', NULL, 'Engines', 'first')")
+    conn.execute("INSERT INTO ABPerson VALUES (2, 'Alan', 'Turing', 'M', NULL, NULL)")
+    conn.executemany(
+        "INSERT INTO ABMultiValue (record_id, property, label, value) VALUES (?, ?, ?, ?)",
+        [
+            (1, 3, None, "+1 555 0100"),
+            (1, 4, None, "ada@example.com"),
+            (1, 22, 1, "+1 555 0101"),
+            (1, 22, 2, "https://example.com"),
+            (1, 5, None, "   "),
+            (2, 99, None, "alan@example.com"),
+            (2, 99, None, "555-123-4567"),
+            (2, 3, None, None),
+        ],
+    )
+    conn.commit()
+    conn.close()
+
+
+def make_coredata_db(path: Path) -> None:
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE ZABCDRECORD (Z_PK INTEGER PRIMARY KEY, ZFIRSTNAME TEXT, ZLASTNAME TEXT, ZORGANIZATION TEXT, ZNOTE TEXT)")
+    conn.execute("CREATE TABLE ZABCDPHONENUMBER (Z_PK INTEGER PRIMARY KEY, ZOWNER INTEGER, ZFULLNUMBER TEXT)")
+    conn.execute("CREATE TABLE ZABCDEMAILADDRESS (Z_PK INTEGER PRIMARY KEY, ZOWNER INTEGER, ZADDRESS TEXT)")
+    conn.execute("INSERT INTO ZABCDRECORD VALUES (1, 'Grace', 'Hopper', 'Navy', NULL), (2, 'Linus', NULL, NULL, 'n')")
+    conn.executemany("INSERT INTO ZABCDPHONENUMBER (ZOWNER, ZFULLNUMBER) VALUES (?, ?)", [(2, "22"), (1, "11"), (1, "12"), (1, None)])
+    conn.execute("INSERT INTO ZABCDEMAILADDRESS (ZOWNER, ZADDRESS) VALUES (1, 'grace@example.com')")
+    conn.commit()
+    conn.close()
+
+
+def test_ab_schema_classifies_multivalues(tmp_path):
+    db = tmp_path / "AddressBook.sqlitedb"
+    make_ab_db(db)
+    contacts = {c["id"]: c for c in read_contacts_from_db(str(db))}
+    ada, alan = contacts[1], contacts[2]
+    assert ada["first"] == "Ada" and ada["middle"] == "" and ada["org"] == "Engines"
+    assert ada["phones"] == ["+1 555 0100", "+1 555 0101"]
+    assert ada["emails"] == ["ada@example.com"]
+    assert ada["urls"] == ["https://example.com"]
+    assert ada["addresses"] == []
+    assert alan["emails"] == ["alan@example.com"]
+    assert alan["phones"] == ["555-123-4567"]
+
+
+def test_ab_schema_strips_tabs_and_newlines(tmp_path):
+    db = tmp_path / "AddressBook.sqlitedb"
+    make_ab_db(db)
+    conn = sqlite3.connect(db)
+    conn.executemany(
+        "INSERT INTO ABMultiValue (record_id, property, label, value) VALUES (?, ?, ?, ?)",
+        [(2, 3, None, "555-0100\n"), (2, 3, None, "\n"), (2, 4, None, "\ta@b.c\t"), (2, 5, None, " \r\n\t")],
+    )
+    conn.commit()
+    conn.close()
+    alan = {c["id"]: c for c in read_contacts_from_db(str(db))}[2]
+    assert alan["phones"] == ["555-123-4567", "555-0100"]
+    assert alan["emails"] == ["alan@example.com", "a@b.c"]
+    assert alan["addresses"] == []
+
+
+def test_ab_schema_leaves_unlabelled_numbers_alone(tmp_path):
+    db = tmp_path / "AddressBook.sqlitedb"
+    conn = sqlite3.connect(db)
+    conn.execute("CREATE TABLE ABPerson (ROWID INTEGER PRIMARY KEY, First TEXT, Last TEXT, Middle TEXT, Organization TEXT, Note TEXT)")
+    conn.execute("CREATE TABLE ABMultiValue (UID INTEGER PRIMARY KEY, record_id INTEGER, property INTEGER, label INTEGER, value)")
+    conn.execute("INSERT INTO ABPerson VALUES (1, 'Ada', NULL, NULL, NULL, NULL)")
+    conn.executemany(
+        "INSERT INTO ABMultiValue (record_id, property, label, value) VALUES (?, ?, ?, ?)",
+        [(1, 99, None, 5551234567), (1, 99, None, "555-123-4567"), (1, 3, None, 5550100)],
+    )
+    conn.commit()
+    conn.close()
+    (ada,) = read_contacts_from_db(str(db))
+    assert ada["phones"] == ["555-123-4567", "5550100"]
+
+
+def test_coredata_schema_collects_child_tables(tmp_path):
+    db = tmp_path / "Contacts.sqlite"
+    make_coredata_db(db)
+    contacts = {c["id"]: c for c in read_contacts_from_db(str(db))}
+    assert contacts[1]["phones"] == ["11", "12"]
+    assert contacts[1]["emails"] == ["grace@example.com"]
+    assert contacts[2]["phones"] == ["22"]
+    assert contacts[2]["last"] == "" and contacts[2]["note"] == "n"
+
+
+def test_open_sqlite_reads_uncheckpointed_wal(tmp_path):
+    db = tmp_path / "AddressBook.sqlitedb"
+    conn = sqlite3.connect(db)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA wal_autocheckpoint=0")
+    conn.execute("CREATE TABLE t (v)")
+    conn.execute("INSERT INTO t VALUES (1)")
+    conn.commit()
+    ro = open_sqlite(str(db))
+    try:
+        assert ro.execute("SELECT count(*) FROM t").fetchone()[0] == 1
+    finally:
+        ro.close()
+        conn.close()
+
+
+def test_pick_best_contacts_db_prefers_addressbook(tmp_path):
+    manifest = tmp_path / "Manifest.db"
+    conn = sqlite3.connect(manifest)
+    conn.execute("CREATE TABLE Files (fileID TEXT PRIMARY KEY, domain TEXT, relativePath TEXT, flags INTEGER, file BLOB)")
+    conn.executemany(
+        "INSERT INTO Files (fileID, domain, relativePath) VALUES (?, ?, ?)",
+        [
+            ("aa01", "HomeDomain", "Library/AddressBook/AddressBookImages.sqlitedb"),
+            ("bb02", "HomeDomain", "Library/AddressBook/AddressBook.sqlitedb"),
+            ("cc03", "HomeDomain", "Library/SMS/sms.db"),
+        ],
+    )
+    conn.commit()
+    conn.close()
+    (tmp_path / "bb").mkdir()
+    (tmp_path / "bb" / "bb02").write_bytes(b"")
+    conn = open_sqlite(str(manifest))
+    try:
+        assert pick_best_contacts_db(str(tmp_path), conn) == str(tmp_path / "bb" / "bb02")
+    finally:
+        conn.close()
+
+
+def test_export_vcf_and_csv(tmp_path):
+    contact = {
+        "first": "Ada", "middle": "", "last": "Love;lace", "org": "Engines, Ltd", "note": "line1\nline2",
+        "phones": ["+1 555 0100"], "emails": ["ada@example.com"], "addresses": ["1 Main St"], "urls": [],
+    }
+    export_vcf([contact], str(tmp_path / "out.vcf"))
+    export_csv([contact], str(tmp_path / "out.csv"))
+    assert (tmp_path / "out.vcf").read_text(encoding="utf-8") == (
+        "BEGIN:VCARD\nVERSION:3.0\n"
+        "N:Love\\;lace;Ada;;;\n"
+        "FN:Ada Love\\;lace\n"
+        "ORG:Engines\\, Ltd\n"
+        "TEL;TYPE=CELL:+1 555 0100\n"
+        "EMAIL;TYPE=INTERNET:ada@example.com\n"
+        "NOTE:line1\\nline2\n"
+        "ITEM1.ADR;TYPE=HOME:;;;;;;1 Main St\n"
+        "END:VCARD\n"
+    )
+    lines = (tmp_path / "out.csv").read_text(encoding="utf-8").splitlines()
+    assert lines[0] == "first,middle,last,org,phones,emails,addresses,urls,note"
+    assert lines[1].startswith("Ada,,Love;lace,\"Engines, Ltd\",+1 555 0100,ada@example.com,1 Main St,,")
+
+
+def test_main_exports_backup_contacts(tmp_path, monkeypatch):
+    backup = tmp_path / "BACKUP_UUID"
+    (backup / "31").mkdir(parents=True)
+    conn = sqlite3.connect(backup / "Manifest.db")
+    conn.execute("CREATE TABLE Files (fileID TEXT PRIMARY KEY, domain TEXT, relativePath TEXT, flags INTEGER, file BLOB)")
+    conn.execute("INSERT INTO Files (fileID, domain, relativePath) VALUES ('31bb', 'HomeDomain', 'Library/AddressBook/AddressBook.sqlitedb')")
+    conn.commit()
+    conn.close()
+    make_ab_db(backup / "31" / "31bb")
+    out_csv, out_vcf = tmp_path / "out" / "c.csv", tmp_path / "out" / "c.vcf"
+    monkeypatch.setattr("sys.argv", ["extract_ios_contacts.py", "--backup-dir", str(backup), "--csv", str(out_csv), "--vcf", str(out_vcf)])
+    main()
+    assert len(out_csv.read_text(encoding="utf-8").splitlines()) == 3
+    assert out_vcf.read_text(encoding="utf-8").count("BEGIN:VCARD") == 2
@@ -0,0 +1,93 @@
+import os
+
+import pytest
+
+from tools import find_ios_backup as fib
+
+
+@pytest.fixture
+def profile(tmp_path, monkeypatch):
+    home = tmp_path / "home"
+    for env, base in (("USERPROFILE", home), ("APPDATA", home / "Roaming"), ("LOCALAPPDATA", home / "Local")):
+        base.mkdir(parents=True, exist_ok=True)
+        monkeypatch.setenv(env, str(base))
+    fib._find_backups.cache_clear()
+    yield home
+    fib._find_backups.cache_clear()
+
+
+def make_backup(root, name, mtime):
+    d = root / name
+    d.mkdir(parents=True)
+    (d / "Manifest.db").write_bytes(b"")
+    os.utime(d / "Manifest.db", (mtime, mtime))
+    return d
+
+
+def test_find_backups_profile_and_onedrive(profile):
+    backup_root = profile / "Apple" / "MobileSync" / "Backup"
+    old = make_backup(backup_root, "old", 1_600_000_000)
+    new = make_backup(profile / "OneDrive - Work" / "Documents" / "Apple" / "MobileSync" / "Backup", "new", 1_700_000_000)
+    (backup_root / "no_manifest").mkdir()
+    (backup_root / "stray.txt").write_text("x")
+    found = fib.find_backups()
+    assert [b.FullPath for b in found] == [str(new), str(old)]
+    assert found[0].Name == "new" and found[0].LastWrite == fib._iso(1_700_000_000)
+
+
+def test_find_backups_without_profile_vars(tmp_path, monkeypatch):
+    for env in ("USERPROFILE", "APPDATA", "LOCALAPPDATA"):
+        monkeypatch.delenv(env, raising=False)
+    monkeypatch.chdir(tmp_path)
+    make_backup(tmp_path / "Apple" / "MobileSync" / "Backup", "cwd", 1_600_000_000)
+    fib._find_backups.cache_clear()
+    assert fib.find_backups() == []
+
+
+def test_user_backup_roots_agree_with_glob(tmp_path):
+    import glob
+
+    users = tmp_path / "Users"
+    for rel in (
+        "alice/Apple/MobileSync/Backup",
+        "alice/OneDrive - Work/Documents/Apple/MobileSync/Backup",
+        "alice/OneDrive/Apple/MobileSync/Backup",
+        "bob/AppData/Local/Apple Computer/MobileSync/Backup",
+        ".hidden/Apple/MobileSync/Backup",
+    ):
+        (users / rel).mkdir(parents=True)
+    (users / "carol").write_text("not a dir")
+    patterns = [("*",) + tail for tail in fib._USER_TAILS] + [("*", "OneDrive*") + tail for tail in fib._ONEDRIVE_TAILS]
+    expected = {p for parts in patterns for p in glob.glob(os.path.join(str(users), *parts))}
+    assert {r for r in fib._user_backup_roots(str(users)) if os.path.isdir(r)} == expected
+    assert fib._user_backup_roots(str(tmp_path / "missing")) == []
+
+
+def test_find_backups_top_n(profile, monkeypatch, capsys):
+    backup_root = profile / "Apple" / "MobileSync" / "Backup"
+    for i, name in enumerate(("b", "a", "c", "d")):
+        make_backup(backup_root, name, 1_600_000_000 + (i % 3) * 1000)
+    full = fib.find_backups()
+    assert [b.Name for b in fib.find_backups(top_n=2)] == [b.Name for b in full[:2]]
+    assert fib.find_backups(top_n=0) == []
+    monkeypatch.setattr("sys.argv", ["find_ios_backup.py", "--first"])
+    fib.main()
+    assert capsys.readouterr().out.strip() == full[0].FullPath
+
+
+def test_render_pretty_truncates_long_paths(monkeypatch, capsys):
+    monkeypatch.setattr(fib, "_term_width", lambda default=120: 80)
+    fib._render_pretty([fib.BackupEntry(Name="abc", FullPath="/p/" + "x" * 200, LastWrite="2024-01-01 10:00:00")])
+    lines = capsys.readouterr().out.splitlines()
+    assert len({len(l) for l in lines[:5]}) == 1
+    assert lines[3].startswith("│ abc" + " " * 19 + " │ 2024-01-01 10:00:00 │ /p/x") and lines[3].endswith("… │")
+
+
+def test_main_json_output(profile, monkeypatch, capsys):
+    import json
+
+    make_backup(profile / "Apple" / "MobileSync" / "Backup", "one", 1_600_000_000)
+    monkeypatch.setattr("sys.argv", ["find_ios_backup.py", "--json"])
+    fib.main()
+    (entry,) = json.loads(capsys.readouterr().out)
+    assert list(entry) == ["Name", "FullPath", "LastWrite"] and entry["Name"] == "one"
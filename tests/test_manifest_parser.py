@@ -0,0 +1,30 @@
+import csv
+import json
+import sqlite3
+
+from tools.manifest_parser import parse_manifest
+
+
+def test_parse_manifest_streams_rows_and_index(tmp_path):
+    backup = tmp_path / "backup"
+    backup.mkdir()
+    conn = sqlite3.connect(backup / "Manifest.db")
+    conn.execute("CREATE TABLE Files (fileID TEXT PRIMARY KEY, domain TEXT, relativePath TEXT, flags INTEGER, file BLOB)")
+    conn.executemany(
+        "INSERT INTO Files (fileID, domain, relativePath) VALUES (?, ?, ?)",
+        [("aa01", "HomeDomain", "Library/SMS/sms.db"), ("bb02", "CameraRollDomain", None)],
+    )
+    conn.commit()
+    conn.close()
+    out = tmp_path / "out"
+    index = parse_manifest(str(backup), str(out))
+    assert index == {"Library/SMS/sms.db": ("aa01", "HomeDomain"), None: ("bb02", "CameraRollDomain")}
+    with open(out / "manifest.csv", newline="", encoding="utf-8") as f:
+        assert list(csv.reader(f)) == [
+            ["fileID", "domain", "relativePath"],
+            ["aa01", "HomeDomain", "Library/SMS/sms.db"],
+            ["bb02", "CameraRollDomain", ""],
+        ]
+    data = json.loads((out / "manifest.json").read_text(encoding="utf-8"))
+    assert data[1] == {"fileID": "bb02", "domain": "CameraRollDomain", "relativePath": None}
+    assert "aa01" in (out / "manifest.html").read_text(encoding="utf-8")
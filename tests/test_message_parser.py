@@ -0,0 +1,64 @@
+import json
+import sqlite3
+from pathlib import Path
+
+from tools.message_parser import extract_messages
+
+
+def make_sms_db(path: Path) -> None:
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE handle (ROWID INTEGER PRIMARY KEY, id TEXT)")
+    conn.execute("CREATE TABLE message (ROWID INTEGER PRIMARY KEY, date INTEGER, is_from_me INTEGER, text TEXT, handle_id INTEGER)")
+    conn.execute("CREATE TABLE attachment (ROWID INTEGER PRIMARY KEY, filename TEXT, transfer_name TEXT)")
+    conn.execute("CREATE TABLE message_attachment_join (message_id INTEGER, attachment_id INTEGER)")
+    conn.execute("INSERT INTO handle VALUES (1, '+15550100')")
+    conn.executemany(
+        "INSERT INTO message VALUES (?, ?, ?, ?, ?)",
+        [
+            (1, 700000000_000000000, 0, "hi", 1),
+            (2, 600000000, 1, "pic", 1),
+            (3, 0, 1, None, 0),
+        ],
+    )
+    conn.executemany(
+        "INSERT INTO attachment VALUES (?, ?, ?)",
+        [(1, "~/Library/SMS/Attachments/ab/IMG_1.jpg", None), (2, "~/Library/SMS/Attachments/cd/gone.mov", "gone.mov")],
+    )
+    conn.executemany("INSERT INTO message_attachment_join VALUES (?, ?)", [(2, 1), (2, 2)])
+    conn.commit()
+    conn.close()
+
+
+def test_extract_messages_exports_and_copies_attachments(tmp_path):
+    src = tmp_path / "src"
+    (src / "x").mkdir(parents=True)
+    make_sms_db(src / "sms.db")
+    (src / "x" / "IMG_1.jpg").write_bytes(b"jpg")
+    out = tmp_path / "out"
+    extract_messages(str(src), str(out))
+    msgs = json.loads((out / "messages.json").read_text(encoding="utf-8"))
+    assert [m["id"] for m in msgs] == [3, 2, 1]
+    assert msgs[0]["datetime"] == "2001-01-01T00:00:00+00:00" and msgs[0]["handle"] is None
+    assert msgs[1]["datetime"] == "2020-01-06T10:40:00+00:00"
+    assert msgs[-1]["datetime"] == "2023-03-08T20:26:40+00:00" and msgs[-1]["handle"] == "+15550100"
+    assert msgs[1]["attachment"] == "IMG_1.jpg" and msgs[1]["attachment_path"] == "~/Library/SMS/Attachments/ab/IMG_1.jpg"
+    assert msgs[1]["attachments"] == "IMG_1.jpg, gone.mov" and msgs[0]["attachments"] is None
+    assert (out / "attachments" / "x" / "IMG_1.jpg").read_bytes() == b"jpg"
+    lines = (out / "messages.csv").read_text(encoding="utf-8").splitlines()
+    assert lines[0] == "id,datetime,is_from_me,handle,text,attachment,attachment_path,attachments"
+    assert len(lines) == 4
+    assert (out / "messages.html").exists()
+
+
+def test_extract_messages_falls_back_to_bodies(tmp_path):
+    src = tmp_path / "src"
+    src.mkdir()
+    conn = sqlite3.connect(src / "sms.db")
+    conn.execute("CREATE TABLE message (ROWID INTEGER PRIMARY KEY, date INTEGER, is_from_me INTEGER, text TEXT)")
+    conn.execute("INSERT INTO message VALUES (1, 0, 1, 'only')")
+    conn.commit()
+    conn.close()
+    assert extract_messages(str(src), str(tmp_path / "out")) == 1
+    msgs = json.loads((tmp_path / "out" / "messages.json").read_text(encoding="utf-8"))
+    assert msgs == [{"id": 1, "datetime": "2001-01-01T00:00:00+00:00", "is_from_me": 1, "handle": None,
+                     "text": "only", "attachment": None, "attachment_path": None, "attachments": None}]
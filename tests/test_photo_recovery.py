@@ -0,0 +1,91 @@
+import hashlib
+import json
+
+from tools.photo_recovery import export_photos
+from utils import iter_files
+
+
+def make_media(root):
+    files = {"DCIM/100APPLE/IMG_0001.JPG": b"first", "DCIM/101APPLE/IMG_0001.JPG": b"second",
+             "DCIM/100APPLE/clip.mov": b"movie", "Library/notes.txt": b"skip", "a/b.heic": b"heic"}
+    for rel, data in files.items():
+        p = root / rel
+        p.parent.mkdir(parents=True, exist_ok=True)
+        p.write_bytes(data)
+
+
+def test_export_photos_rows_follow_walk_order(tmp_path):
+    src = tmp_path / "src"
+    make_media(src)
+    media = [e for e in iter_files(str(src)) if not e.name.endswith(".txt")]
+    rows = export_photos(str(src), str(tmp_path / "out"))
+    assert [r["filename"] for r in rows] == [e.name for e in media]
+    contents = [open(e.path, "rb").read() for e in media]
+    assert [r["sha256"] for r in rows] == [hashlib.sha256(c).hexdigest() for c in contents]
+    # Same basename: the later file in walk order is the one left in the gallery
+    last_img = [c for e, c in zip(media, contents) if e.name == "IMG_0001.JPG"][-1]
+    assert (tmp_path / "out" / "original" / "IMG_0001.JPG").read_bytes() == last_img
+    assert json.loads((tmp_path / "out" / "photos.json").read_text(encoding="utf-8")) == rows
+
+
+def test_pillow_exif_matches_exifread(tmp_path, monkeypatch):
+    import pytest
+    Image = pytest.importorskip("PIL.Image")
+    pytest.importorskip("exifread")
+    from PIL.TiffImagePlugin import IFDRational
+    import tools.photo_recovery as pr
+    exif = Image.Exif()
+    exif[271], exif[272] = "Apple", "iPhone 12"
+    exif.get_ifd(0x8769)[36867] = "2023:03:08 12:00:00"
+    exif.get_ifd(0x8825)[2] = (IFDRational(37), IFDRational(46), IFDRational(3123, 100))
+    exif.get_ifd(0x8825)[4] = (IFDRational(122), IFDRational(25), IFDRational(10, 4))
+    Image.new("RGB", (8, 8)).save(tmp_path / "e.jpg", exif=exif)
+    fast = pr._extract_exif(str(tmp_path / "e.jpg"))
+    monkeypatch.setattr(pr, "PIL_OK", False)
+    assert fast == pr._extract_exif(str(tmp_path / "e.jpg"))
+    assert fast["GPS GPSLatitude"] == "[37, 46, 3123/100]" and fast["Image Model"] == "iPhone 12"
+    # Parsed from the bytes the copy kept, without opening the file again
+    head = (tmp_path / "e.jpg").read_bytes()[:pr.EXIF_HEAD]
+    (tmp_path / "e.jpg").unlink()
+    assert pr._extract_exif(str(tmp_path / "e.jpg"), head) == fast
+    monkeypatch.setattr(pr, "PIL_OK", True)
+    assert pr._extract_exif(str(tmp_path / "e.jpg"), head) == fast
+
+
+def test_exif_pool_starts_while_copy_threads_run(tmp_path, monkeypatch):
+    import warnings
+    from concurrent.futures import ProcessPoolExecutor
+    import tools.photo_recovery as pr
+    if not (pr.PIL_OK or pr.EXIF_OK):
+        import pytest
+        pytest.skip("no EXIF reader")
+    monkeypatch.setattr(pr, "EXIF_CHUNK", 1)  # first flush happens inside the copy thread pool
+    monkeypatch.setattr(pr, "EXIF_POOL_MIN", 0)
+    methods = []
+
+    def pool(**kw):
+        methods.append(kw["mp_context"].get_start_method())
+        return ProcessPoolExecutor(**kw)
+
+    monkeypatch.setattr(pr, "ProcessPoolExecutor", pool)
+    src = tmp_path / "src"
+    make_media(src)
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", DeprecationWarning)  # fork() with threads running
+        rows = export_photos(str(src), str(tmp_path / "out"))
+    assert len(rows) == 4
+    assert methods and "fork" not in methods
+
+
+def test_small_exports_parse_exif_inline(tmp_path, monkeypatch):
+    import tools.photo_recovery as pr
+    monkeypatch.setattr(pr, "ProcessPoolExecutor", None)  # any use would fail
+    src = tmp_path / "src"
+    make_media(src)
+    assert len(export_photos(str(src), str(tmp_path / "out"))) == 4
+
+
+def test_copy_jobs_group_names_case_insensitively():
+    from tools.photo_recovery import _copy_jobs
+    media = ["a/IMG.JPG", "b/clip.mov", "c/img.jpg"]
+    assert _copy_jobs(media, [1, 0, 2]) == [[1], [0, 2]]
@@ -0,0 +1,35 @@
+import json
+
+from tools.report_generator import build_report
+
+
+def test_build_report_counts_items(tmp_path):
+    root = tmp_path / "Rescue"
+    docs = {
+        "messages": [{"text": "a, [b] {c} \"d\"", "n": -2.5}, {"text": None, "n": 12345}, ["x", []]],
+        "photos": [],
+        "notes": {"not": "a list"},
+    }
+    for name, doc in docs.items():
+        (root / name).mkdir(parents=True)
+        (root / name / f"{name}.json").write_text(json.dumps(doc, indent=2), encoding="utf-8")
+    (root / "calendar").mkdir()
+    (root / "calendar" / "events.json").write_text("[1, 2", encoding="utf-8")
+    (root / "empty").mkdir()
+    summary = build_report(str(root), str(tmp_path / "report.html"))
+    assert {s["module"]: s["items"] for s in summary} == {
+        "calendar": "—", "empty": "—", "messages": 3, "notes": 1, "photos": 0}
+
+
+def test_build_report_skips_unreadable_json(tmp_path):
+    root = tmp_path / "Rescue"
+    for name in ("bom", "latin1", "ok", "cut", "trailing"):
+        (root / name).mkdir(parents=True)
+    (root / "bom" / "bom.json").write_text("\ufeff[1, 2]", encoding="utf-8")
+    (root / "latin1" / "latin1.json").write_bytes('["caf\u00e9"]'.encode("latin-1"))
+    (root / "ok" / "ok.json").write_text("[1, 2]", encoding="utf-8")
+    (root / "cut" / "cut.json").write_text('{"a":', encoding="utf-8")
+    (root / "trailing" / "trailing.json").write_text("[1, 2] x", encoding="utf-8")
+    summary = build_report(str(root), str(tmp_path / "report.html"))
+    assert {s["module"]: s["items"] for s in summary} == {
+        "bom": "—", "cut": "—", "latin1": "—", "ok": 2, "trailing": "—"}
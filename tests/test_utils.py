@@ -0,0 +1,282 @@
+import csv
+import datetime
+import hashlib
+import json
+import os
+import sqlite3
+from contextlib import closing
+from pathlib import Path
+
+import pytest
+
+import utils
+from tools.password_rescue import probe_password_artifacts
+from utils import (
+    _ext, apple_time_to_dt, apple_times_to_iso, dt_to_iso, find_backup_file, find_first, find_in_backup, find_table,
+    iter_files, open_sqlite, scan_backup, sqlite_ro_uri, table_exists, walk_find, write_csv, write_exports,
+    write_html_table, write_json, write_json_iter,
+)
+
+
+def make_tree(root: Path) -> None:
+    for rel in ("a.txt", "sub/b.txt", "sub/deeper/Calendar.sqlite", "sub2/c.txt", "sub2/calendar.sqlite"):
+        p = root / rel
+        p.parent.mkdir(parents=True, exist_ok=True)
+        p.write_text(rel)
+
+
+def test_iter_files_matches_os_walk(tmp_path):
+    make_tree(tmp_path)
+    expected = sorted(os.path.join(d, f) for d, _, files in os.walk(tmp_path) for f in files)
+    assert sorted(e.path for e in iter_files(str(tmp_path))) == expected
+
+
+def test_find_first_and_walk_find(tmp_path):
+    make_tree(tmp_path)
+    assert find_first(str(tmp_path), ("Calendar.sqlite",)) == str(tmp_path / "sub" / "deeper" / "Calendar.sqlite")
+    assert find_first(str(tmp_path), ("missing.db",)) is None
+    assert len(walk_find(str(tmp_path), ["CALENDAR.sqlite"])) == 2
+
+
+def test_write_exports_matches_list_writers(tmp_path):
+    rows = [{"id": 1, "text": "a,\"b\"\nc", "when": None}, {"id": 2, "text": "ünï", "when": "2024"}]
+    write_csv(str(tmp_path / "ref.csv"), rows)
+    write_json(str(tmp_path / "ref.json"), rows)
+    assert write_exports(str(tmp_path), "out", "Rows", iter(rows)) == 2
+    assert (tmp_path / "out.csv").read_bytes() == (tmp_path / "ref.csv").read_bytes()
+    assert (tmp_path / "out.json").read_bytes() == (tmp_path / "ref.json").read_bytes()
+    assert "<td>ünï</td>" in (tmp_path / "out.html").read_text(encoding="utf-8")
+
+
+def test_write_html_table_escapes_cells(tmp_path):
+    write_html_table(str(tmp_path / "t.html"), "A & B", [{"<k>": "<script>x</script>", "n": None, "v": 3}])
+    html = (tmp_path / "t.html").read_text(encoding="utf-8")
+    assert "<title>A &amp; B</title>" in html and "<th>&lt;k&gt;</th>" in html
+    assert "<tr><td>&lt;script&gt;x&lt;/script&gt;</td><td></td><td>3</td></tr>" in html
+    assert "<script>" not in html
+
+
+def test_write_csv_streams_like_dictwriter(tmp_path):
+    rows = [{"id": 1, "text": "a,\"b\"\nc", "when": None}, {"id": 2, "text": "ünï"}]
+    with open(tmp_path / "ref.csv", "w", newline="", encoding="utf-8") as f:
+        w = csv.DictWriter(f, fieldnames=["id", "text", "when"])
+        w.writeheader()
+        w.writerows(rows)
+    assert write_csv(str(tmp_path / "out.csv"), iter(rows)) == 2
+    assert (tmp_path / "out.csv").read_bytes() == (tmp_path / "ref.csv").read_bytes()
+    assert write_csv(str(tmp_path / "empty.csv"), iter(())) == 0
+    assert (tmp_path / "empty.csv").read_bytes() == b""
+
+
+def test_write_csv_keeps_keys_of_later_rows(tmp_path):
+    rows = [{"filename": "a.jpg", "sha256": "1"}, {"filename": "b.jpg", "sha256": "2", "Image Make": "Apple"}]
+    assert write_csv(str(tmp_path / "list.csv"), rows) == 2
+    assert (tmp_path / "list.csv").read_text(encoding="utf-8").splitlines() == [
+        "filename,sha256,Image Make", "a.jpg,1,", "b.jpg,2,Apple"]
+    assert write_csv(str(tmp_path / "fields.csv"), iter(rows), fields=["sha256", "Image Make", "filename"]) == 2
+    assert (tmp_path / "fields.csv").read_text(encoding="utf-8").splitlines()[2] == "2,Apple,b.jpg"
+    with pytest.raises(ValueError):
+        write_csv(str(tmp_path / "stream.csv"), iter(rows))
+
+
+def test_write_exports_empty(tmp_path):
+    assert write_exports(str(tmp_path), "out", "Rows", []) == 0
+    assert (tmp_path / "out.csv").read_text() == ""
+    assert (tmp_path / "out.json").read_text() == "[]"
+
+
+def test_apple_times_to_iso_matches_scalar_path():
+    values = [None, 0, 700000000.5, 700000000123, 700000000123456789, -1.25, 1e300, float("nan")]
+    assert apple_times_to_iso(values) == [dt_to_iso(apple_time_to_dt(v)) for v in values]
+
+
+def test_apple_times_to_iso_rejects_numeric_strings():
+    values = [700000000, "123", b"1", None, 1.5]
+    assert apple_times_to_iso(values) == [dt_to_iso(apple_time_to_dt(v)) for v in values]
+    assert apple_times_to_iso(values)[1:4] == [None, None, None]
+
+
+def test_find_table_is_case_insensitive(tmp_path):
+    db = tmp_path / "Manifest.db"
+    conn = sqlite3.connect(db)
+    conn.execute("CREATE TABLE file (fileID TEXT)")
+    conn.execute("CREATE VIEW Files AS SELECT * FROM file")
+    conn.execute("CREATE TABLE other (v)")
+    conn.close()
+    conn = open_sqlite(str(db))
+    try:
+        assert find_table(conn, ("Files", "FILE")) == "file"
+        assert find_table(conn, ("OTHER", "file")) == "other"
+        assert find_table(conn, ("file", "OTHER")) == "file"
+        assert table_exists(conn, "FILE") and not table_exists(conn, "missing")
+        assert find_table(conn, ()) is None
+        assert find_table(conn, ("missing", "other", "FILE")) == "other"
+    finally:
+        conn.close()
+
+
+def test_open_sqlite_is_read_only(tmp_path):
+    db = tmp_path / "x.db"
+    conn = sqlite3.connect(db)
+    conn.execute("CREATE TABLE t (v)")
+    conn.close()
+    conn = open_sqlite(str(db))
+    try:
+        assert conn.execute("PRAGMA query_only").fetchone()[0] == 1
+        assert conn.execute("PRAGMA temp_store").fetchone()[0] == 2
+        with pytest.raises(sqlite3.OperationalError):
+            conn.execute("INSERT INTO t VALUES (1)")
+    finally:
+        conn.close()
+
+
+def test_open_sqlite_opens_a_connection_per_call(tmp_path):
+    db = tmp_path / "x.db"
+    conn = sqlite3.connect(db)
+    conn.execute("CREATE TABLE t (v)")
+    conn.commit()
+    first = open_sqlite(str(db))
+    first.row_factory = None
+    again = open_sqlite(str(db))
+    assert again is not first and again.row_factory is sqlite3.Row
+    first.close()
+    assert again.execute("SELECT count(*) FROM t").fetchone()[0] == 0
+    again.close()
+    conn.execute("INSERT INTO t VALUES (1)")
+    conn.commit()
+    conn.close()
+    with closing(open_sqlite(str(db))) as ro:
+        assert ro.execute("SELECT count(*) FROM t").fetchone()[0] == 1
+    with pytest.raises(sqlite3.OperationalError):
+        open_sqlite(str(tmp_path / "missing.db"))
+
+
+def test_write_json_iter_matches_write_json(tmp_path):
+    items = [{"a": 1, "b": ["x", "é"]}, {"a": None, "b": []}]
+    for data in (items, []):
+        write_json(str(tmp_path / "a.json"), data)
+        assert write_json_iter(str(tmp_path / "b.json"), iter(data)) == len(data)
+        assert (tmp_path / "a.json").read_bytes() == (tmp_path / "b.json").read_bytes()
+
+
+def test_write_json_matches_stdlib_layout(tmp_path):
+    data = [{"id": 1, "when": datetime.datetime(2024, 1, 2, 3, 4, 5), "tags": ["é", "\x1f"], 2: {}},
+            {"big": 2 ** 70, "f": 0.5, "raw": b"\x00"}]
+    for obj in (data[0], data[1], data):  # the second one is past orjson's int range
+        write_json(str(tmp_path / "a.json"), obj)
+        assert (tmp_path / "a.json").read_text(encoding="utf-8") == json.dumps(obj, ensure_ascii=False, indent=2, default=str)
+
+
+def test_open_sqlite_keeps_uncheckpointed_wal(tmp_path):
+    db = tmp_path / "odd #1?%.db"
+    conn = sqlite3.connect(db)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA wal_autocheckpoint=0")
+    conn.execute("CREATE TABLE t (v)")
+    conn.execute("INSERT INTO t VALUES (1)")
+    conn.commit()
+    assert "immutable=1" not in sqlite_ro_uri(str(db))
+    ro = open_sqlite(str(db))
+    try:
+        assert ro.execute("SELECT count(*) FROM t").fetchone()[0] == 1
+    finally:
+        ro.close()
+        conn.close()
+    assert sqlite_ro_uri(str(db)).endswith("?mode=ro&immutable=1")
+    ro = open_sqlite(str(db))
+    try:
+        assert ro.execute("SELECT count(*) FROM t").fetchone()[0] == 1
+    finally:
+        ro.close()
+
+
+def test_scan_backup_indexes_in_walk_order(tmp_path):
+    make_tree(tmp_path)
+    (tmp_path / "sub2" / "IMG.JPG").write_text("x")
+    (tmp_path / "sub" / "x.jpg").write_text("x")
+    walk = [e.path for e in iter_files(str(tmp_path))]
+    scan = scan_backup(str(tmp_path))
+    assert scan.files == walk
+    assert scan_backup(str(tmp_path)) is scan
+    assert scan.with_ext({".jpg", ".txt"}) == [p for p in walk if p.lower().endswith((".jpg", ".txt"))]
+    assert scan.named(["calendar.sqlite", "b.txt"], ignore_case=True) == [
+        p for p in walk if os.path.basename(p).lower() in ("calendar.sqlite", "b.txt")]
+    assert scan.first(["Calendar.sqlite"]) == str(tmp_path / "sub" / "deeper" / "Calendar.sqlite")
+    assert scan.named(["CALENDAR.sqlite"]) == []
+    (tmp_path / "late.db").write_text("x")
+    assert find_in_backup(str(tmp_path), ["late.db"]) is None  # answered from the cached scan
+    assert scan_backup(str(tmp_path), refresh=True).first(["late.db"]) == str(tmp_path / "late.db")
+    assert find_in_backup(str(tmp_path / "sub"), ["b.txt"]) == str(tmp_path / "sub" / "b.txt")
+
+
+def test_scan_backup_disk_order_follows_inodes(tmp_path):
+    make_tree(tmp_path)
+    scan = scan_backup(str(tmp_path), refresh=True)
+    paths = list(reversed(scan.files))
+    order = scan.disk_order(paths)
+    assert sorted(order) == list(range(len(paths)))
+    if any(scan.inodes):
+        assert [os.stat(paths[i]).st_ino for i in order] == sorted(os.stat(p).st_ino for p in paths)
+
+
+def test_scan_extension_split_matches_splitext(tmp_path):
+    for name in ("a.b.c", ".bashrc", "..a.b", "a.", "...", "noext", ".a.tar.gz", "a..b", "..", "."):
+        assert _ext(name) == os.path.splitext(name)[1], name
+
+
+def test_hash_file_across_chunks(tmp_path, monkeypatch):
+    monkeypatch.setattr(utils, "HASH_CHUNK", 7)
+    for data in (b"", b"short", bytes(range(256)) * 3):
+        (tmp_path / "f").write_bytes(data)
+        assert utils.hash_file(str(tmp_path / "f")) == hashlib.sha256(data).hexdigest()
+
+
+def test_copy_and_hash_matches_copy_then_hash(tmp_path, monkeypatch):
+    monkeypatch.setattr(utils, "HASH_CHUNK", 5)
+    src = tmp_path / "src.heic"
+    src.write_bytes(bytes(range(256)) * 2)
+    os.utime(src, ns=(1_600_000_000_000_000_000, 1_600_000_000_123_456_000))
+    digest = utils.copy_and_hash(str(src), str(tmp_path / "out" / "dst.heic"))
+    assert digest == utils.hash_file(str(src))
+    assert (tmp_path / "out" / "dst.heic").read_bytes() == src.read_bytes()
+    assert os.stat(tmp_path / "out" / "dst.heic").st_mtime_ns == 1_600_000_000_123_456_000
+
+
+def test_find_backup_file_via_manifest_or_derived_id(tmp_path):
+    backup = tmp_path / "backup"
+    (backup / "ab").mkdir(parents=True)
+    (backup / "ab" / "ab01").write_bytes(b"sms")
+    conn = sqlite3.connect(backup / "Manifest.db")
+    conn.execute("CREATE TABLE Files (fileID TEXT PRIMARY KEY, domain TEXT, relativePath TEXT, flags INTEGER, file BLOB)")
+    conn.execute("INSERT INTO Files (fileID, domain, relativePath) VALUES ('ab01', 'HomeDomain', 'Library/SMS/sms.db')")
+    conn.commit()
+    conn.close()
+    assert find_backup_file(str(backup), "HomeDomain", "Library/SMS/sms.db") == str(backup / "ab" / "ab01")
+    assert find_backup_file(str(backup), "HomeDomain", "Library/Notes/notes.sqlite") is None
+    old = tmp_path / "old"  # no Manifest.db, flat layout
+    old.mkdir()
+    (old / "3d0d7e5fb2ce288813306e4d4636395e047a3d28").write_bytes(b"sms")
+    assert find_backup_file(str(old), "HomeDomain", "Library/SMS/sms.db") == str(old / "3d0d7e5fb2ce288813306e4d4636395e047a3d28")
+    assert find_backup_file(str(old), "HomeDomain", "Library/Notes/notes.sqlite") is None
+    # Encrypted backup: the derived file exists but isn't a readable SQLite database
+    assert find_backup_file(str(old), "HomeDomain", "Library/SMS/sms.db", sqlite=True) is None
+    (old / "3d0d7e5fb2ce288813306e4d4636395e047a3d28").unlink()
+    conn = sqlite3.connect(old / "3d0d7e5fb2ce288813306e4d4636395e047a3d28")
+    conn.execute("CREATE TABLE t (v)")
+    conn.close()
+    assert find_backup_file(str(old), "HomeDomain", "Library/SMS/sms.db", sqlite=True) == str(old / "3d0d7e5fb2ce288813306e4d4636395e047a3d28")
+
+
+def test_probe_password_artifacts_keeps_scan_hits(tmp_path):
+    backup = tmp_path / "backup"
+    (backup / "cd").mkdir(parents=True)
+    (backup / "cd" / "cd01").write_bytes(b"plist")
+    (backup / "x").mkdir()
+    (backup / "x" / "Keychain-2.db").write_bytes(b"db")
+    conn = sqlite3.connect(backup / "Manifest.db")
+    conn.execute("CREATE TABLE Files (fileID TEXT PRIMARY KEY, domain TEXT, relativePath TEXT)")
+    conn.execute("INSERT INTO Files VALUES ('cd01', 'KeychainDomain', 'keychain-backup.plist')")
+    conn.commit()
+    conn.close()
+    hits = probe_password_artifacts(str(backup))
+    assert hits == [str(backup / "cd" / "cd01"), str(backup / "x" / "Keychain-2.db")]
@@ -1,20 +1,90 @@
 import os, shutil
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional
-from utils import ensure_dir, log_info, log_warn, log_ok
+from typing import Dict, Iterable, Optional
+from utils import ensure_dir, log_info, log_warn, log_ok, find_in_backup, iter_files, BackupScan
+
+COPY_CHUNK = 1 << 30  # bytes per copy_file_range call
+
+def _copy_bytes(src: str, dst: str):
+    # copy_file_range keeps the copy in the kernel and lets the filesystem clone
+    # (btrfs/XFS reflinks, NFS server-side copy); anything it can't do
+    # (cross-device, unsupported fs, non-Linux) goes through shutil.copyfile.
+    # Some filesystems (procfs, FUSE, NFS/CIFS, older cross-fs kernels) report
+    # 0 bytes up front for a non-empty file, so like CPython's own fast path a
+    # copy that moved nothing, or not the whole file, is redone by copyfile
+    if hasattr(os, "copy_file_range"):
+        try:
+            with open(src, "rb") as fi, open(dst, "wb") as fo:
+                size = os.fstat(fi.fileno()).st_size
+                copied = 0
+                while True:
+                    n = os.copy_file_range(fi.fileno(), fo.fileno(), COPY_CHUNK)
+                    if not n:
+                        break
+                    copied += n
+            if copied and copied == size:
+                return
+        except OSError:
+            pass
+    shutil.copyfile(src, dst)
+
+def _copy_with_times(src: str, dst: str) -> str:
+    # Only the bytes and the access/modify times (no permission bits or flags)
+    st = os.stat(src)
+    _copy_bytes(src, dst)
+    os.utime(dst, ns=(st.st_atime_ns, st.st_mtime_ns))
+    return dst
 
 def safe_copy_by_basename(source_root: str, target_basename: str, dest_root: str) -> Optional[str]:
     """
     Fallback strategy: walk the backup tree and copy the first file that matches the basename
     (sms.db often stores absolute paths that don't exist within the backup folder structure).
+    Only the bytes and the access/modify times are copied (no permission bits or flags), so the
+    copy can stay in the kernel.
     """
-    for dirpath, _, filenames in os.walk(source_root):
-        for fn in filenames:
-            if fn == target_basename:
-                src = os.path.join(dirpath, fn)
-                rel = os.path.relpath(src, start=source_root)
-                dst = os.path.join(dest_root, rel)
-                ensure_dir(os.path.dirname(dst))
-                shutil.copy2(src, dst)
-                return dst
-    return None
\ No newline at end of file
+    src = find_in_backup(source_root, (target_basename,))
+    if not src:
+        return None
+    dst = os.path.join(dest_root, os.path.relpath(src, start=source_root))
+    ensure_dir(os.path.dirname(dst))
+    return _copy_with_times(src, dst)
+
+def safe_copy_many(source_root: str, basenames: Iterable[str], dest_root: str,
+                   scan: Optional[BackupScan] = None) -> Dict[str, str]:
+    """
+    Batched safe_copy_by_basename: copies the first match (walk order) of each basename on a
+    thread pool. With a BackupScan of source_root the matches are dict lookups; without one the
+    tree is walked once for all names, copying while the walk continues. Returns
+    {basename: copied path}; names that weren't found or failed to copy are left out.
+    """
+    wanted = set(basenames)
+    if not wanted:
+        return {}
+    if scan is not None:
+        matches = scan.first_of(wanted).items()
+    else:
+        matches = _walk_matches(source_root, wanted)
+    futures = {}
+    with ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 1) * 4)) as pool:
+        for name, src in matches:
+            dst = os.path.join(dest_root, os.path.relpath(src, start=source_root))
+            ensure_dir(os.path.dirname(dst))
+            futures[name] = pool.submit(_copy_with_times, src, dst)
+    copied = {}
+    for name, fut in futures.items():
+        try:
+            copied[name] = fut.result()
+        except OSError as e:
+            log_warn(f"Attachment copy failed for {name}: {e}")
+    return copied
+
+def _walk_matches(source_root: str, wanted: set):
+    # (basename, path) of the first file per wanted name, stopping once all are found
+    wanted = set(wanted)
+    for entry in iter_files(source_root):
+        if entry.name in wanted:
+            wanted.discard(entry.name)
+            yield entry.name, entry.path
+            if not wanted:
+                return
@@ -1,13 +1,27 @@
 import os, sqlite3
-from utils import open_sqlite, ensure_dir, write_csv, write_json, write_html_table, log_ok
-from typing import List, Dict
-from utils import apple_time_to_dt, dt_to_iso
+from utils import open_sqlite, write_exports, log_ok, find_in_backup
+from utils import apple_times_to_iso
+from settings import CAL_DB_CANDIDATES
 
 def _find_calendar_db(source: str):
-    for root, _, files in os.walk(source):
-        if "Calendar.sqlite" in files:
-            return os.path.join(root, "Calendar.sqlite")
-    return None
+    return find_in_backup(source, CAL_DB_CANDIDATES)
+
+DATE_BATCH = 10000  # events converted per apple_times_to_iso call
+
+def _event_rows(cur, keys, start_col, end_col):
+    # Pull events in batches so both date columns go through one vectorized
+    # conversion each, while rows still stream out one at a time
+    while True:
+        batch = cur.fetchmany(DATE_BATCH)
+        if not batch:
+            return
+        starts = apple_times_to_iso([r[start_col] for r in batch])
+        ends = apple_times_to_iso([r[end_col] for r in batch])
+        for r, start, end in zip(batch, starts, ends):
+            vals = list(r)
+            vals[start_col] = start
+            vals[end_col] = end
+            yield dict(zip(keys, vals))
 
 def extract_calendar(source: str, outdir: str):
     db = _find_calendar_db(source)
@@ -15,7 +29,8 @@ def extract_calendar(source: str, outdir: str):
         raise FileNotFoundError("Calendar.sqlite not found")
     conn = open_sqlite(db)
     cur = conn.cursor()
-    rows: List[Dict] = []
+    cur.row_factory = None  # plain tuples: the scan below only indexes by position
+    # Rows are generated straight off the cursor and streamed into the exports
     try:
         q = """
         SELECT
@@ -28,27 +43,12 @@ def extract_calendar(source: str, outdir: str):
         FROM Event e
         LEFT JOIN Calendar c ON e.calendar_id = c.ROWID
         """
-        for r in cur.execute(q):
-            rows.append({
-                "id": r["id"],
-                "title": r["title"],
-                "description": r["description"],
-                "start": dt_to_iso(apple_time_to_dt(r["start_apple"])),
-                "end": dt_to_iso(apple_time_to_dt(r["end_apple"])),
-                "calendar": r["calendar"],
-            })
+        cur.execute(q)
+        rows = _event_rows(cur, ("id", "title", "description", "start", "end", "calendar"), 3, 4)
     except Exception:
         # Fallback: dump some columns
-        for r in cur.execute("SELECT ROWID as id, summary as title, start_date, end_date FROM Event"):
-            rows.append({
-                "id": r["id"],
-                "title": r["title"],
-                "start": dt_to_iso(apple_time_to_dt(r["start_date"])),
-                "end": dt_to_iso(apple_time_to_dt(r["end_date"])),
-            })
-    ensure_dir(outdir)
-    write_csv(os.path.join(outdir, "calendar.csv"), rows)
-    write_json(os.path.join(outdir, "calendar.json"), rows)
-    write_html_table(os.path.join(outdir, "calendar.html"), "Calendar Events", rows[:2000])
-    log_ok(f"Calendar exported: {len(rows)}")
-    return rows
\ No newline at end of file
+        cur.execute("SELECT ROWID as id, summary as title, start_date, end_date FROM Event")
+        rows = _event_rows(cur, ("id", "title", "start", "end"), 2, 3)
+    n = write_exports(outdir, "calendar", "Calendar Events", rows)
+    log_ok(f"Calendar exported: {n}")
+    return n
@@ -1,89 +1,101 @@
 import os, sqlite3
-from typing import List, Dict
-from utils import walk_find, open_sqlite, write_csv, write_json, write_html_table, ensure_dir, log_info, log_ok, log_warn
+from itertools import chain
+from typing import Dict, Iterator, List
+from utils import find_in_backup, open_sqlite, write_csv, write_json_iter, write_html_table, ensure_dir, log_info, log_ok, log_warn
 from settings import CONTACT_DB_CANDIDATES
 
-def _table_exists(conn, name: str) -> bool:
-    cur = conn.execute("SELECT name FROM sqlite_master WHERE type='table' AND name=?", (name,))
-    return cur.fetchone() is not None
+_SEP = "\x1f"  # ASCII unit separator (char(31)): can't collide with phone/email text
 
-def _extract_abperson(conn) -> List[Dict]:
-    # Legacy AddressBook schema
-    people = []
+def _has_columns(conn, table: str, *cols: str) -> bool:
+    # Compiles the statement without reading a row
     try:
-        cur = conn.execute("SELECT ROWID as id, First, Last, Organization FROM ABPerson")
-        base = {r["id"]: {"id": r["id"], "first": r["First"], "last": r["Last"], "organization": r["Organization"], "phones": [], "emails": []} for r in cur.fetchall()}
-        # ABMultiValue holds phones/emails…
-        try:
-            cur = conn.execute("SELECT record_id as id, value, label, property FROM ABMultiValue")
-            for r in cur.fetchall():
-                if r["id"] in base:
-                    if r["property"] in (3,):   # phones
-                        base[r["id"]]["phones"].append(r["value"])
-                    elif r["property"] in (4,): # emails
-                        base[r["id"]]["emails"].append(r["value"])
-        except sqlite3.Error:
-            pass
-        people = list(base.values())
+        conn.execute(f"SELECT {', '.join(cols)} FROM {table} LIMIT 0")
+        return True
+    except sqlite3.Error:
+        return False
+
+def _grouped(table: str, owner: str, cols: str, value: str, aggregates: str) -> str:
+    # One aggregated row per owner. Grouping the child table once and joining the
+    # result (SQLite indexes it automatically) stays fast without an index on the
+    # owner column; values are concatenated in table order, like a plain scan
+    return (f"(SELECT o, {aggregates} FROM (SELECT {owner} AS o, {cols} FROM {table} "
+            f"WHERE {value} IS NOT NULL ORDER BY {owner}, ROWID) GROUP BY o)")
+
+def _split(joined) -> List[str]:
+    return joined.split(_SEP) if joined is not None else []
+
+def _people(cur) -> Iterator[Dict]:
+    try:
+        for r in cur:
+            yield {"id": r[0], "first": r[1], "last": r[2], "organization": r[3],
+                   "phones": _split(r[4]), "emails": _split(r[5])}
+    except sqlite3.Error as e:
+        # A damaged page mid-scan: keep what was read so far
+        log_warn(f"Contacts read stopped early: {e}")
+
+def _extract_abperson(conn) -> Iterator[Dict]:
+    # Legacy AddressBook schema; ABMultiValue holds phones (property 3) and emails (4)
+    people = iter(())
+    try:
+        lists, join = "NULL, NULL", ""
+        if _has_columns(conn, "ABMultiValue", "record_id", "property", "value"):
+            mv = _grouped("ABMultiValue", "record_id", "property, value", "value",
+                          "group_concat(CASE WHEN property = 3 THEN value END, char(31)) AS phones, "
+                          "group_concat(CASE WHEN property = 4 THEN value END, char(31)) AS emails")
+            lists, join = "mv.phones, mv.emails", f"LEFT JOIN {mv} mv ON mv.o = p.ROWID"
+        people = _people(conn.execute(
+            f"SELECT p.ROWID, p.First, p.Last, p.Organization, {lists} FROM ABPerson p {join} ORDER BY p.ROWID"))
     except sqlite3.Error:
         pass
     return people
 
-def _extract_znames(conn) -> List[Dict]:
+def _extract_znames(conn) -> Iterator[Dict]:
     # Modern Contacts.sqlite (AddressBook.framework CoreData)
-    people = []
+    people = iter(())
     try:
-        cur = conn.execute("SELECT Z_PK as id, ZFIRSTNAME as first, ZLASTNAME as last, ZORGANIZATION as organization FROM ZABCDRECORD")
-        ids = [r["id"] for r in cur.fetchall()]
-        conn.row_factory = sqlite3.Row
-        cur = conn.execute("SELECT Z_PK as id, ZFIRSTNAME as first, ZLASTNAME as last, ZORGANIZATION as organization FROM ZABCDRECORD")
-        records = {r["id"]: dict(r) | {"phones": [], "emails": []} for r in cur.fetchall()}
-        # Phones
-        try:
-            cur = conn.execute("SELECT ZOWNER as owner, ZFULLNUMBER as number FROM ZABCDPHONENUMBER WHERE ZFULLNUMBER IS NOT NULL")
-            for r in cur.fetchall():
-                if r["owner"] in records:
-                    records[r["owner"]]["phones"].append(r["number"])
-        except sqlite3.Error:
-            pass
-        # Emails
-        try:
-            cur = conn.execute("SELECT ZOWNER as owner, ZADDRESS as email FROM ZABCDEMAILADDRESS WHERE ZADDRESS IS NOT NULL")
-            for r in cur.fetchall():
-                if r["owner"] in records:
-                    records[r["owner"]]["emails"].append(r["email"])
-        except sqlite3.Error:
-            pass
-        people = list(records.values())
+        lists, joins = [], []
+        for alias, table, value in (("ph", "ZABCDPHONENUMBER", "ZFULLNUMBER"), ("em", "ZABCDEMAILADDRESS", "ZADDRESS")):
+            if _has_columns(conn, table, "ZOWNER", value):
+                child = _grouped(table, "ZOWNER", value, value, f"group_concat({value}, char(31)) AS vals")
+                lists.append(f"{alias}.vals")
+                joins.append(f"LEFT JOIN {child} {alias} ON {alias}.o = r.Z_PK")
+            else:
+                lists.append("NULL")
+        people = _people(conn.execute(
+            f"SELECT r.Z_PK, r.ZFIRSTNAME, r.ZLASTNAME, r.ZORGANIZATION, {', '.join(lists)} "
+            f"FROM ZABCDRECORD r {' '.join(joins)} ORDER BY r.Z_PK"))
     except sqlite3.Error:
         pass
     return people
 
 def extract_contacts(source: str, outdir: str, fmt: str = "csv"):
-    hits = walk_find(source, CONTACT_DB_CANDIDATES)
-    if not hits:
+    db = find_in_backup(source, CONTACT_DB_CANDIDATES, ignore_case=True)
+    if not db:
         raise FileNotFoundError("No contacts DB found (looked for AddressBook/Contacts.sqlite variants).")
-    db = hits[0]
     conn = open_sqlite(db)
-    conn.row_factory = sqlite3.Row
+    conn.row_factory = None  # extractors read columns by position
 
+    # Both extractors are lazy: the query has run, rows are built as consumed
     people = _extract_abperson(conn)
-    if not people:
-        people = _extract_znames(conn)
+    first = next(people, None)
+    people = chain((first,), people) if first is not None else _extract_znames(conn)
 
     ensure_dir(outdir)
     rows = []
-    for p in people:
-        rows.append({
-            "id": p.get("id"),
-            "first": p.get("first"),
-            "last": p.get("last"),
-            "organization": p.get("organization"),
-            "phones": ", ".join(p.get("phones", [])),
-            "emails": ", ".join(p.get("emails", [])),
-        })
+    def flatten():
+        # contacts.json keeps the phone/email lists; the table rows join them
+        for p in people:
+            rows.append({
+                "id": p.get("id"),
+                "first": p.get("first"),
+                "last": p.get("last"),
+                "organization": p.get("organization"),
+                "phones": ", ".join(p.get("phones", [])),
+                "emails": ", ".join(p.get("emails", [])),
+            })
+            yield p
+    write_json_iter(os.path.join(outdir, "contacts.json"), flatten())
     write_csv(os.path.join(outdir, "contacts.csv"), rows)
-    write_json(os.path.join(outdir, "contacts.json"), people)
     write_html_table(os.path.join(outdir, "contacts.html"), "Contacts", rows)
     log_ok(f"Contacts exported: {len(rows)}")
-    return rows
\ No newline at end of file
+    return rows
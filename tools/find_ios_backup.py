@@ -13,13 +13,16 @@ Usage:
 """
 import argparse
 import ctypes
-import glob
+import functools
+import heapq
 import json
+import operator
 import os
 import shutil
-from dataclasses import dataclass, asdict
+import stat
+from dataclasses import dataclass
 from datetime import datetime
-from typing import List, Iterable
+from typing import List, Iterable, Optional, Tuple
 
 @dataclass
 class BackupEntry:
@@ -36,22 +39,66 @@ def _iso(ts: float) -> str:
 def _exists(p: str) -> bool:
     return p and os.path.exists(p)
 
-def _add_candidates_from_root(results: List[BackupEntry], backup_root: str):
+# Path tails as pre-split segments, joined once per base directory
+_BACKUP_TAIL = ("Apple", "MobileSync", "Backup")
+_ONEDRIVE_TAILS = (_BACKUP_TAIL, ("Desktop",) + _BACKUP_TAIL, ("Documents",) + _BACKUP_TAIL)
+_USER_TAILS = (
+    _BACKUP_TAIL,
+    ("AppData", "Roaming", "Apple Computer", "MobileSync", "Backup"),
+    ("AppData", "Local", "Apple Computer", "MobileSync", "Backup"),
+)
+
+def _onedrive_dirs(home: str) -> List[str]:
+    """OneDrive* folders directly under a profile: one directory read, no glob."""
+    prefix = os.path.normcase("OneDrive")
+    try:
+        with os.scandir(home) as it:
+            return [e.path for e in it if os.path.normcase(e.name).startswith(prefix) and e.is_dir()]
+    except OSError:
+        return []
+
+def _user_backup_roots(users_root: str) -> List[str]:
+    """Candidate backup roots under every profile in a Users folder: one scandir of
+    Users, then each user is visited once and expanded with all suffixes (plus one
+    scandir for its OneDrive* folders). Dot-named entries are skipped; roots that
+    don't exist cost a single failed scandir in _add_candidates_from_root."""
+    try:
+        with os.scandir(users_root) as it:
+            users = [e.path for e in it if not e.name.startswith(".") and e.is_dir()]
+    except OSError:
+        return []
+    roots = []
+    for user in users:
+        roots.extend(os.path.join(user, *tail) for tail in _USER_TAILS)
+        roots.extend(os.path.join(od, *tail) for od in _onedrive_dirs(user) for tail in _ONEDRIVE_TAILS)
+    return roots
+
+# Found backups are plain (Name, FullPath, LastWrite) tuples until find_backups
+# hands them out; only the entries actually returned become BackupEntry objects
+_Found = Tuple[str, str, str]
+_LAST_WRITE = operator.itemgetter(2)
+
+def _add_candidates_from_root(results: List[_Found], backup_root: str):
     r"""Enumerate hash directories under a root like ...\MobileSync\Backup"""
-    if not _exists(backup_root):
+    if not backup_root:
         return
+    # One scandir instead of exists + listdir + isdir per child; a single stat
+    # of Manifest.db answers both "is it a file" and its mtime
     try:
-        for name in os.listdir(backup_root):
-            full = os.path.join(backup_root, name)
-            if not os.path.isdir(full):
-                continue
-            mf = os.path.join(full, "Manifest.db")
-            if os.path.isfile(mf):
-                mtime = os.path.getmtime(mf)
-                results.append(BackupEntry(Name=name, FullPath=os.path.abspath(full), LastWrite=_iso(mtime)))
-    except PermissionError:
+        with os.scandir(backup_root) as it:
+            for entry in it:
+                if not entry.is_dir():
+                    continue
+                try:
+                    st = os.stat(os.path.join(entry.path, "Manifest.db"))
+                except OSError:
+                    continue
+                if stat.S_ISREG(st.st_mode):
+                    results.append((entry.name, os.path.abspath(entry.path), _iso(st.st_mtime)))
+    except (FileNotFoundError, NotADirectoryError, PermissionError):
         pass
 
+@functools.lru_cache(maxsize=1)
 def _get_fixed_drives() -> List[str]:
     """Return drive roots like ['C:\\', 'D:\\'] (Windows only)."""
     drives = []
@@ -63,28 +110,36 @@ def _get_fixed_drives() -> List[str]:
                 drives.append(root)
     return drives
 
-def find_backups(all_drives: bool = False) -> List[BackupEntry]:
-    results: List[BackupEntry] = []
+def find_backups(all_drives: bool = False, top_n: Optional[int] = None) -> List[BackupEntry]:
+    """Backups newest first; with top_n only the newest top_n (heapq.nlargest,
+    same result as sorting and slicing, without the full sort)."""
+    # Probing is memoized per process; ordering is done per call on a fresh list
+    found = _find_backups(all_drives)
+    if top_n is not None:
+        found = heapq.nlargest(top_n, found, key=_LAST_WRITE)
+    else:
+        found = sorted(found, key=_LAST_WRITE, reverse=True)
+    return [BackupEntry(*e) for e in found]
+
+@functools.lru_cache(maxsize=None)
+def _find_backups(all_drives: bool) -> Tuple[_Found, ...]:
+    results: List[_Found] = []
 
     HOME = os.environ.get("USERPROFILE", "")
     APPDATA = os.environ.get("APPDATA", "")
     LOCALAPPDATA = os.environ.get("LOCALAPPDATA", "")
 
-    roots = [
-        os.path.join(HOME, "Apple", "MobileSync", "Backup"),
-        os.path.join(APPDATA, "Apple Computer", "MobileSync", "Backup"),
-        os.path.join(LOCALAPPDATA, "Apple Computer", "MobileSync", "Backup"),
-        os.path.join(LOCALAPPDATA, "Apple", "MobileSync", "Backup"),
-    ]
+    # An unset variable would turn these into paths relative to the cwd
+    roots = [os.path.join(base, *tail) for base, tail in (
+        (HOME, _BACKUP_TAIL),
+        (APPDATA, ("Apple Computer", "MobileSync", "Backup")),
+        (LOCALAPPDATA, ("Apple Computer", "MobileSync", "Backup")),
+        (LOCALAPPDATA, _BACKUP_TAIL),
+    ) if base]
 
     # OneDrive variants under same profile
-    for od_root in glob.glob(os.path.join(HOME, "OneDrive*")):
-        for tail in (
-            os.path.join("Apple", "MobileSync", "Backup"),
-            os.path.join("Desktop", "Apple", "MobileSync", "Backup"),
-            os.path.join("Documents", "Apple", "MobileSync", "Backup"),
-        ):
-            roots.append(os.path.join(od_root, tail))
+    if HOME:
+        roots.extend(os.path.join(od_root, *tail) for od_root in _onedrive_dirs(HOME) for tail in _ONEDRIVE_TAILS)
 
     # Dedup + probe
     seen = set()
@@ -100,21 +155,11 @@ def find_backups(all_drives: bool = False) -> List[BackupEntry]:
             users_root = os.path.join(drv, "Users")
             if not _exists(users_root):
                 continue
-            patterns = [
-                os.path.join(users_root, "*", "Apple", "MobileSync", "Backup"),
-                os.path.join(users_root, "*", "AppData", "Roaming", "Apple Computer", "MobileSync", "Backup"),
-                os.path.join(users_root, "*", "AppData", "Local", "Apple Computer", "MobileSync", "Backup"),
-                os.path.join(users_root, "*", "OneDrive*", "Apple", "MobileSync", "Backup"),
-                os.path.join(users_root, "*", "OneDrive*", "Desktop", "Apple", "MobileSync", "Backup"),
-                os.path.join(users_root, "*", "OneDrive*", "Documents", "Apple", "MobileSync", "Backup"),
-            ]
-            for pat in patterns:
-                for root in glob.glob(pat):
-                    _add_candidates_from_root(results, root)
-
-    uniq = {e.FullPath: e for e in results}
-    out = sorted(uniq.values(), key=lambda x: x.LastWrite, reverse=True)
-    return out
+            for root in _user_backup_roots(users_root):
+                _add_candidates_from_root(results, root)
+
+    uniq = {e[1]: e for e in results}
+    return tuple(uniq.values())
 
 # --------------------- pretty printing ---------------------
 def _term_width(default: int = 120) -> int:
@@ -145,27 +190,29 @@ def _render_pretty(backups: List[BackupEntry]):
     overhead = 12 + name_w + time_w
     path_w = max(min_path, cols_total - overhead)
 
-    top    = f"┌{'─'* (name_w+2)}┬{'─'* (time_w+2)}┬{'─'* (path_w+2)}┐"
-    header = f"│ {'Name'.ljust(name_w)} │ {'LastWrite'.ljust(time_w)} │ {'FullPath'.ljust(path_w)} │"
-    sep    = f"├{'─'* (name_w+2)}┼{'─'* (time_w+2)}┼{'─'* (path_w+2)}┤"
-    rows: Iterable[str] = (
-        f"│ {_truncate(b.Name, name_w).ljust(name_w)} │ "
-        f"{_truncate(b.LastWrite, time_w).ljust(time_w)} │ "
-        f"{_truncate(b.FullPath, path_w).ljust(path_w)} │"
+    def cell(s: str, w: int) -> str:
+        # Pad short values straight away; only over-long ones get truncated
+        return s.ljust(w) if len(s) <= w else _truncate(s, w)
+
+    bars = ('─' * (name_w + 2), '─' * (time_w + 2), '─' * (path_w + 2))
+    lines = [
+        "┌{}┬{}┬{}┐".format(*bars),
+        f"│ {'Name'.ljust(name_w)} │ {'LastWrite'.ljust(time_w)} │ {'FullPath'.ljust(path_w)} │",
+        "├{}┼{}┼{}┤".format(*bars),
+    ]
+    lines.extend(
+        f"│ {cell(b.Name, name_w)} │ {cell(b.LastWrite, time_w)} │ {cell(b.FullPath, path_w)} │"
         for b in backups
     )
-    bottom = f"└{'─'* (name_w+2)}┴{'─'* (time_w+2)}┴{'─'* (path_w+2)}┘"
-
-    print(top)
-    print(header)
-    print(sep)
-    for line in rows:
-        print(line)
-    print(bottom)
-    print(f"Found {len(backups)} backup(s). Newest shown first.\n")
-    print("Tip:")
-    print("  $BACKUP = python .\\tools\\find_ios_backup.py --first")
-    print("  py .\\Python_iOS\\extract_ios_contacts.py --backup-dir \"$BACKUP\" --csv \"$env:USERPROFILE\\Desktop\\contacts.csv\" --vcf \"$env:USERPROFILE\\Desktop\\contacts.vcf\"")
+    lines += [
+        "└{}┴{}┴{}┘".format(*bars),
+        f"Found {len(backups)} backup(s). Newest shown first.\n",
+        "Tip:",
+        "  $BACKUP = python .\\tools\\find_ios_backup.py --first",
+        "  py .\\Python_iOS\\extract_ios_contacts.py --backup-dir \"$BACKUP\" --csv \"$env:USERPROFILE\\Desktop\\contacts.csv\" --vcf \"$env:USERPROFILE\\Desktop\\contacts.vcf\"",
+    ]
+    # One write for the whole table instead of one print per line
+    print("\n".join(lines))
 
 def _render_plain(backups: List[BackupEntry]):
     if not backups:
@@ -188,14 +235,14 @@ def main():
     ap.add_argument("--plain", action="store_true", help="Plain text table instead of pretty box drawing")
     args = ap.parse_args()
 
-    backups = find_backups(all_drives=args.all_drives)
+    backups = find_backups(all_drives=args.all_drives, top_n=1 if args.first else None)
 
     if args.first:
         print(backups[0].FullPath if backups else "")
         return
 
     if args.json:
-        print(json.dumps([asdict(b) for b in backups], indent=2))
+        print(json.dumps([vars(b) for b in backups], indent=2))  # fields in declaration order, no deep copy
         return
 
     if args.plain:
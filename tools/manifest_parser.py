@@ -1,52 +1,39 @@
 import os, sqlite3
 from pathlib import Path
-from typing import Dict, List
-from utils import open_sqlite, write_csv, write_json, write_html_table, ensure_dir, log_info, log_ok, log_warn
+from typing import Dict, Tuple
+from utils import open_sqlite, write_exports, log_info, log_ok, log_warn, find_in_backup, find_table
 
-def parse_manifest(source: str, outdir: str) -> Dict[str, dict]:
+def parse_manifest(source: str, outdir: str) -> Dict[str, Tuple[str, str]]:
     # Find Manifest.db by walking (some backups have multiple; take the first)
-    manifest = None
-    for root, _, files in os.walk(source):
-        if "Manifest.db" in files:
-            manifest = os.path.join(root, "Manifest.db")
-            break
+    manifest = find_in_backup(source, ("Manifest.db",))
     if not manifest:
         raise FileNotFoundError("Manifest.db not found — are you pointing at the <BackupUUID> folder?")
 
     conn = open_sqlite(manifest)
     cur = conn.cursor()
+    cur.row_factory = None  # plain tuples: the scan below only indexes by position
     # iOS Manifest schema can be Files or file, try both
-    table_name = None
-    for cand in ("Files", "file", "FILE"):
-        try:
-            cur.execute(f"SELECT count(*) FROM {cand}"); cur.fetchone()
-            table_name = cand; break
-        except sqlite3.Error:
-            continue
+    table_name = find_table(conn, ("Files", "file", "FILE"))
     if not table_name:
         raise RuntimeError("Unrecognized Manifest.db schema (no Files/file table).")
 
-    rows = []
     try:
         cur.execute(f"SELECT fileID, domain, relativePath FROM {table_name}")
-        for r in cur.fetchall():
-            rows.append({"fileID": r["fileID"], "domain": r["domain"], "relativePath": r["relativePath"]})
     except sqlite3.Error:
-        # Some schema: file contains relativePath in 'relativePath' or 'path'
+        # Some schema: file contains path in 'path' instead of 'relativePath'
         try:
-            cur.execute(f"SELECT fileID, domain, relativePath as relativePath FROM {table_name}")
-            for r in cur.fetchall():
-                rows.append({"fileID": r["fileID"], "domain": r["domain"], "relativePath": r["relativePath"]})
+            cur.execute(f"SELECT fileID, domain, path FROM {table_name}")
         except sqlite3.Error:
-            pass
+            cur = iter(())
+
+    # Single pass: rows go straight from the cursor into the exports and the
+    # lookup index is filled on the way (relativePath -> (fileID, domain))
+    index: Dict[str, Tuple[str, str]] = {}
+    def rows():
+        for r in cur:
+            index[r[2]] = (r[0], r[1])
+            yield r
 
-    ensure_dir(outdir)
-    write_csv(os.path.join(outdir, "manifest.csv"), rows)
-    write_json(os.path.join(outdir, "manifest.json"), rows)
-    write_html_table(os.path.join(outdir, "manifest.html"), "Manifest Index", rows)
-    log_ok(f"Manifest parsed: {len(rows)} items")
-    # Build quick lookup dict
-    index = {}
-    for r in rows:
-        index[r["relativePath"]] = {"fileID": r["fileID"], "domain": r["domain"]}
-    return index
\ No newline at end of file
+    n = write_exports(outdir, "manifest", "Manifest Index", rows(), fields=("fileID", "domain", "relativePath"))
+    log_ok(f"Manifest parsed: {n} items")
+    return index
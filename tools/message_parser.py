@@ -1,16 +1,55 @@
 import os, sqlite3
+from collections import defaultdict
 from pathlib import Path
-from typing import Dict, List, Optional
-from utils import open_sqlite, write_csv, write_json, write_html_table, ensure_dir, log_info, log_ok, log_warn, apple_time_to_dt, dt_to_iso
-from settings import SMS_DB_CANDIDATES
-from tools.attachment_manager import safe_copy_by_basename
+from typing import Dict, Iterator, List, Optional, Tuple
+from utils import open_sqlite, write_exports, ensure_dir, log_info, log_ok, log_warn, apple_times_to_iso, scan_backup, find_backup_file
+from settings import SMS_DB_CANDIDATES, SMS_DB_BACKUP_PATHS
+from tools.attachment_manager import safe_copy_many
+
+MESSAGE_BATCH = 10000  # rows per fetchmany / apple_times_to_iso call
 
 def _find_sms_db(source: str) -> Optional[str]:
-    for root, _, files in os.walk(source):
-        for cand in SMS_DB_CANDIDATES:
-            if cand in files:
-                return os.path.join(root, cand)
-    return None
+    # Manifest.db lookup in a backup; otherwise the full shared scan rather
+    # than an early-exit walk, since the attachment copy reuses it
+    for domain, rel in SMS_DB_BACKUP_PATHS:
+        db = find_backup_file(source, domain, rel, sqlite=True)
+        if db:
+            return db
+    return scan_backup(source).first(SMS_DB_CANDIDATES)
+
+def _attachments(cur: sqlite3.Cursor) -> Dict[int, List[Tuple[Optional[str], Optional[str]]]]:
+    # {message_id: [(name, path), ...]} in join order, from one pass over the
+    # join table; a message with N attachments stays one message row
+    by_msg: Dict[int, List[Tuple[Optional[str], Optional[str]]]] = defaultdict(list)
+    try:
+        for mid, fn, name in cur.execute("""
+            SELECT maj.message_id, a.filename, a.transfer_name
+            FROM message_attachment_join maj
+            JOIN attachment a ON a.ROWID = maj.attachment_id
+            ORDER BY maj.ROWID"""):
+            by_msg[mid].append((name or (os.path.basename(fn) if fn else None), fn))
+    except sqlite3.Error:
+        log_warn("Attachment tables not readable; exporting messages without attachments.")
+    return dict(by_msg)
+
+MESSAGE_FIELDS = ("id", "datetime", "is_from_me", "handle", "text", "attachment", "attachment_path", "attachments")
+
+def _message_rows(cur: sqlite3.Cursor, handles: Dict[int, str],
+                  attachments: Dict[int, List[Tuple[Optional[str], Optional[str]]]]) -> Iterator[Tuple]:
+    # One MESSAGE_FIELDS tuple per message: handle ids resolved from the
+    # preloaded handles, the first attachment in the flat columns and every
+    # attachment name in "attachments". Each fetchmany batch converts its dates
+    # in one vectorized call
+    while True:
+        batch = cur.fetchmany()
+        if not batch:
+            return
+        dates = apple_times_to_iso([r[1] for r in batch])
+        for (msg_id, _, is_from_me, text, handle_id), iso in zip(batch, dates):
+            atts = attachments.get(msg_id)
+            name, path = atts[0] if atts else (None, None)
+            yield (msg_id, iso, is_from_me, handles.get(handle_id), text, name, path,
+                   ", ".join(n for n, _ in atts if n) if atts else None)
 
 def extract_messages(source: str, outdir: str, resolve_contacts_json: Optional[str] = None):
     db_path = _find_sms_db(source)
@@ -19,7 +58,7 @@ def extract_messages(source: str, outdir: str, resolve_contacts_json: Optional[s
     conn = open_sqlite(db_path)
     c = conn.cursor()
     # Basic schema fields
-    # Gather handles
+    # Gather handles (resolved per row in Python rather than joined in SQL)
     handles = {}
     try:
         for r in c.execute("SELECT ROWID as id, id as handle FROM handle"):
@@ -27,69 +66,40 @@ def extract_messages(source: str, outdir: str, resolve_contacts_json: Optional[s
     except sqlite3.Error:
         pass
 
-    # Messages with joins (schema varies by iOS)
-    messages = []
-    attach_rows = []
+    attachments = _attachments(c)
+    attach_files = [fn for atts in attachments.values() for _, fn in atts if fn]
+
+    # Messages (schema varies by iOS), streamed in fetchmany batches straight
+    # into the exports
+    c.arraysize = MESSAGE_BATCH
+    c.row_factory = None  # plain tuples, unpacked by position in _message_rows
     try:
-        q = """
+        c.execute("""
         SELECT
             m.ROWID as msg_id,
             m.date as date_apple,
             m.is_from_me as is_from_me,
             m.text as text,
-            h.id as handle,
-            a.filename as attachment_filename,
-            a.transfer_name as attachment_name
+            m.handle_id as handle_id
         FROM message m
-        LEFT JOIN handle h ON m.handle_id = h.ROWID
-        LEFT JOIN message_attachment_join maj ON maj.message_id = m.ROWID
-        LEFT JOIN attachment a ON a.ROWID = maj.attachment_id
         ORDER BY m.date ASC
-        """
-        for r in c.execute(q):
-            dt = apple_time_to_dt(r["date_apple"])
-            messages.append({
-                "id": r["msg_id"],
-                "datetime": dt_to_iso(dt),
-                "is_from_me": r["is_from_me"],
-                "handle": r["handle"],
-                "text": r["text"],
-                "attachment": r["attachment_name"] or (os.path.basename(r["attachment_filename"]) if r["attachment_filename"] else None),
-                "attachment_path": r["attachment_filename"],
-            })
-            if r["attachment_filename"]:
-                attach_rows.append(r)
+        """)
     except sqlite3.Error:
         log_warn("Schema variant not supported; exporting message bodies only.")
-        for r in c.execute("SELECT ROWID as msg_id, date as date_apple, is_from_me, text FROM message ORDER BY date ASC"):
-            dt = apple_time_to_dt(r["date_apple"])
-            messages.append({
-                "id": r["msg_id"],
-                "datetime": dt_to_iso(dt),
-                "is_from_me": r["is_from_me"],
-                "handle": None,
-                "text": r["text"],
-                "attachment": None,
-                "attachment_path": None,
-            })
+        c.execute("SELECT ROWID as msg_id, date as date_apple, is_from_me, text, NULL as handle_id FROM message ORDER BY date ASC")
+    # Tuples go to the CSV writer as-is; HTML capped at 2000 rows
+    n = write_exports(outdir, "messages", "Messages", _message_rows(c, handles, attachments), fields=MESSAGE_FIELDS)
 
     # Attachment copy best-effort
     attach_dir = os.path.join(outdir, "attachments")
     ensure_dir(attach_dir)
-    for a in attach_rows:
-        fn = a["attachment_filename"]
-        if not fn: 
-            continue
-        base = os.path.basename(fn)
-        copied = safe_copy_by_basename(source, base, attach_dir)
-        if not copied:
+    # Basename lookups in one scan of the backup + concurrent copies; the scan
+    # only runs when there is something to copy
+    bases = list(dict.fromkeys(os.path.basename(f) for f in attach_files))
+    copied = safe_copy_many(source, bases, attach_dir, scan=scan_backup(source)) if bases else {}
+    for base in bases:
+        if base not in copied:
             log_warn(f"Attachment not found in backup for: {base}")
 
-    # Write outputs
-    ensure_dir(outdir)
-    write_csv(os.path.join(outdir, "messages.csv"), messages)
-    write_json(os.path.join(outdir, "messages.json"), messages)
-    write_html_table(os.path.join(outdir, "messages.html"), "Messages", messages[:2000])  # avoid huge HTMLs
-
-    log_ok(f"Messages exported: {len(messages)} (attachments: {len(attach_rows)})")
-    return messages
\ No newline at end of file
+    log_ok(f"Messages exported: {n} (attachments: {len(attach_files)})")
+    return n
\ No newline at end of file
@@ -1,13 +1,14 @@
 import os, sqlite3
-from utils import open_sqlite, ensure_dir, write_csv, write_json, write_html_table, log_ok, log_warn
+from utils import open_sqlite, ensure_dir, write_csv, write_json, write_html_table, log_ok, log_warn, find_in_backup, find_backup_file
+from settings import NOTES_DB_CANDIDATES, NOTES_DB_BACKUP_PATHS
 from typing import List, Dict
 
 def _find_note_db(source: str):
-    for root, _, files in os.walk(source):
-        for cand in ("NoteStore.sqlite","notes.sqlite"):
-            if cand in files:
-                return os.path.join(root, cand)
-    return None
+    for domain, rel in NOTES_DB_BACKUP_PATHS:
+        db = find_backup_file(source, domain, rel, sqlite=True)
+        if db:
+            return db
+    return find_in_backup(source, NOTES_DB_CANDIDATES)
 
 def extract_notes(source: str, outdir: str):
     db = _find_note_db(source)
@@ -1,17 +1,17 @@
 import os
-from utils import log_info, log_warn, log_ok
+from utils import log_info, log_warn, log_ok, scan_backup, find_backup_file
+from settings import KEYCHAIN_BACKUP_PATHS
 
 def probe_password_artifacts(source: str):
     """
     Research-only: we do NOT attempt to decrypt Keychain here.
     We only report if likely keychain backups or hints are present.
     """
-    hits = []
-    candidates = ["keychain-backup.plist", "Keychain-2.db", "keychain-2.db"]
-    for root, _, files in os.walk(source):
-        for cand in candidates:
-            if cand in files:
-                hits.append(os.path.join(root, cand))
+    # Hashed backup files only turn up through Manifest.db; the scan still
+    # reports every plainly named artifact (Keychain-2.db copies among them)
+    hits = [p for p in (find_backup_file(source, d, rel) for d, rel in KEYCHAIN_BACKUP_PATHS) if p]
+    hits += [p for p in scan_backup(source).named(("keychain-backup.plist", "Keychain-2.db", "keychain-2.db"))
+             if p not in hits]
     if hits:
         log_ok(f"Potential keychain artifacts detected: {len(hits)} files")
     else:
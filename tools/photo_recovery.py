@@ -1,7 +1,11 @@
-import os
+import io, multiprocessing, os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from fractions import Fraction
 from pathlib import Path
-from typing import List, Dict
-from utils import ensure_dir, write_csv, write_json, write_html_table, log_info, log_ok, log_warn, hash_file
+from typing import Dict, List, Optional, Tuple
+from utils import ensure_dir, write_csv, write_json, write_html_table, log_info, log_ok, log_warn, copy_hash_head, scan_backup
 from settings import PHOTO_EXTS
 
 try:
@@ -17,20 +21,45 @@ except Exception:
     EXIF_OK = False
 
 def _gather_media(source: str) -> List[str]:
-    hits = []
-    for dirpath, _, filenames in os.walk(source):
-        for fn in filenames:
-            ext = os.path.splitext(fn)[1].lower()
-            if ext in PHOTO_EXTS:
-                hits.append(os.path.join(dirpath, fn))
-    return hits
-
-def _extract_exif(path: str) -> Dict:
-    if not EXIF_OK:
-        return {}
+    return scan_backup(source).with_ext(PHOTO_EXTS)
+
+# Formats Pillow reads EXIF from without decoding pixels; HEIC and videos
+# go straight to exifread
+_PIL_EXIF_EXTS = frozenset({".jpg", ".jpeg", ".tif", ".tiff", ".png", ".webp"})
+
+def _ratio_str(v) -> str:
+    # exifread's rendering of a rational: reduced, "n" or "n/d"
+    try:
+        f = Fraction(v.numerator, v.denominator)
+    except (AttributeError, TypeError, ZeroDivisionError):
+        return str(v)
+    return str(f.numerator) if f.denominator == 1 else f"{f.numerator}/{f.denominator}"
+
+def _exif_pillow(src) -> Optional[Dict]:
+    # The same five tags as the exifread path, rendered the way exifread prints
+    # them, read by numeric ID from Pillow's C-side EXIF parse (IFD0 271/272,
+    # Exif IFD 36867, GPS IFD 2/4). src is a path or binary file; None if
+    # Pillow can't read it
+    try:
+        with Image.open(src) as img:
+            exif = img.getexif()
+            sub = exif.get_ifd(0x8769)
+            gps = exif.get_ifd(0x8825)
+    except Exception:
+        return None
+    out = {}
+    for key, v in (("Image Make", exif.get(271)), ("Image Model", exif.get(272)),
+                   ("EXIF DateTimeOriginal", sub.get(36867))):
+        if v is not None:
+            out[key] = str(v).split("\x00", 1)[0]
+    for key, v in (("GPS GPSLatitude", gps.get(2)), ("GPS GPSLongitude", gps.get(4))):
+        if v is not None:
+            out[key] = "[" + ", ".join(_ratio_str(x) for x in v) + "]" if isinstance(v, tuple) else _ratio_str(v)
+    return out
+
+def _exif_exifread(f) -> Dict:
     try:
-        with open(path, "rb") as f:
-            tags = exifread.process_file(f, details=False)
+        tags = exifread.process_file(f, details=False)
         out = {}
         for k in ("Image Make","Image Model","EXIF DateTimeOriginal","GPS GPSLatitude","GPS GPSLongitude"):
             if k in tags:
@@ -39,30 +68,158 @@ def _extract_exif(path: str) -> Dict:
     except Exception:
         return {}
 
+def _exif_from(path: str, src) -> Dict:
+    # EXIF of path, read from src (the path itself or a binary file)
+    if PIL_OK and os.path.splitext(path)[1].lower() in _PIL_EXIF_EXTS:
+        out = _exif_pillow(src)
+        if out is not None:
+            return out
+    if not EXIF_OK:
+        return {}
+    if isinstance(src, str):
+        try:
+            with open(src, "rb") as f:
+                return _exif_exifread(f)
+        except OSError:
+            return {}
+    src.seek(0)
+    return _exif_exifread(src)
+
+def _extract_exif(path: str, head: bytes = b"") -> Dict:
+    # head: the file's first bytes, kept from the copy. EXIF almost always sits
+    # there (a JPEG APP1 segment is at most 64 KiB); only when it yields
+    # nothing is the file itself opened
+    if head:
+        out = _exif_from(path, io.BytesIO(head))
+        if out:
+            return out
+    return _exif_from(path, path)
+
+PHOTO_WORKERS = (os.cpu_count() or 1) * 2  # copy + hash is I/O-bound
+EXIF_WORKERS = os.cpu_count() or 1          # EXIF parsing is CPU-bound Python
+EXIF_CHUNK = 32                             # paths per worker round-trip
+EXIF_INFLIGHT = EXIF_WORKERS * 4            # batches queued before copying waits
+EXIF_HEAD = 64 << 10                        # leading bytes of each copy kept for EXIF
+EXIF_POOL_MIN = 256                         # fewer files: parse inline, no worker start-up
+
+def _copy_group(gallery_dir: str, srcs: List[str], head: int = 0) -> List[Optional[Tuple[str, bytes]]]:
+    # Sources sharing a basename share one gallery file: they run in order within
+    # one task, so the last one wins. Returns each source's (sha256, first head
+    # bytes), None if its copy failed
+    out: List[Optional[Tuple[str, bytes]]] = []
+    for src in srcs:
+        # Copy + hash in one read of the source
+        try:
+            out.append(copy_hash_head(src, os.path.join(gallery_dir, os.path.basename(src)), head))
+        except Exception as e:
+            log_warn(f"Copy failed for {src}: {e}")
+            out.append(None)
+    return out
+
+def _copy_jobs(media: List[str], order: List[int]) -> List[List[int]]:
+    # Media indices grouped by destination basename, groups in the given (disk)
+    # order. Case-folded: on case-insensitive filesystems (macOS, Windows)
+    # IMG.JPG and img.jpg are the same gallery file and must not race
+    groups: Dict[str, List[int]] = {}
+    for i, src in enumerate(media):
+        groups.setdefault(os.path.normcase(os.path.basename(src)).lower(), []).append(i)
+    rank = [0] * len(media)
+    for r, i in enumerate(order):
+        rank[i] = r
+    return sorted(groups.values(), key=lambda idxs: rank[idxs[0]])
+
+def _exif_batch(items: List[Tuple[str, bytes]]) -> List[Dict]:
+    return [_extract_exif(p, head) for p, head in items]
+
+def _exif_context():
+    # Workers start on the first flush, while copy threads are running; forking
+    # a multi-threaded process can deadlock, so they come from a forkserver
+    # (spawn where there is none, e.g. Windows)
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+def _exif_pool() -> Optional[ProcessPoolExecutor]:
+    if not (PIL_OK or EXIF_OK):
+        return None
+    try:
+        return ProcessPoolExecutor(max_workers=EXIF_WORKERS, mp_context=_exif_context())
+    except OSError:
+        return None
+
+def _export_pipeline(media: List[str], gallery_dir: str, order: List[int]) -> List[Optional[Dict]]:
+    # Copy + hash on a thread pool (I/O) feeding EXIF parsing on a process pool
+    # (CPU) as copies finish, in EXIF_CHUNK batches with at most EXIF_INFLIGHT
+    # outstanding, so disk and cores stay busy together. EXIF comes from each
+    # source, byte-identical to its copy (a gallery file shared by several
+    # sources only holds the last one), parsed from the EXIF_HEAD bytes the
+    # copy already read. Rows come back in media order
+    hashes: List[Optional[str]] = [None] * len(media)
+    heads: Dict[int, bytes] = {}
+    metas: List[Dict] = [{}] * len(media)
+    pending: deque = deque()
+    batch: List[int] = []
+    # Workers re-import utils, rich, numpy and PIL; below EXIF_POOL_MIN files
+    # that start-up costs more than parsing on this thread
+    cpu = _exif_pool() if len(media) >= EXIF_POOL_MIN else None
+
+    def finish(idxs: List[int], fut):
+        try:
+            found = fut.result() if fut is not None else None
+        except (OSError, BrokenProcessPool):
+            found = None
+        if found is None:
+            found = _exif_batch([(media[i], heads[i]) for i in idxs])
+        for i, meta in zip(idxs, found):
+            metas[i] = meta
+            del heads[i]
+
+    def flush():
+        fut = None
+        if cpu is not None:
+            try:
+                fut = cpu.submit(_exif_batch, [(media[i], heads[i]) for i in batch])
+            except (OSError, RuntimeError):  # pool broken/shut down: parse here
+                pass
+        pending.append((list(batch), fut))
+        batch.clear()
+        while len(pending) > (EXIF_INFLIGHT if fut is not None else 0):
+            finish(*pending.popleft())
+
+    exif = PIL_OK or EXIF_OK
+    head = EXIF_HEAD if exif else 0
+    jobs = _copy_jobs(media, order)
+    try:
+        with ThreadPoolExecutor(max_workers=PHOTO_WORKERS) as pool:
+            done = pool.map(lambda idxs: _copy_group(gallery_dir, [media[i] for i in idxs], head), jobs)
+            for idxs, copies in zip(jobs, done):
+                for i, copied in zip(idxs, copies):
+                    if copied is not None:
+                        hashes[i], first = copied
+                        if exif:
+                            heads[i] = first
+                            batch.append(i)
+                if len(batch) >= EXIF_CHUNK:
+                    flush()
+        if batch:
+            flush()
+        while pending:
+            finish(*pending.popleft())
+    finally:
+        if cpu is not None:
+            cpu.shutdown(cancel_futures=True)
+    return [None if h is None else {"filename": os.path.basename(src), "sha256": h, **meta}
+            for src, h, meta in zip(media, hashes, metas)]
+
 def export_photos(source: str, outdir: str, convert_heic: bool = False):
     ensure_dir(outdir)
     media = _gather_media(source)
-    rows = []
     gallery_dir = os.path.join(outdir, "original")
     ensure_dir(gallery_dir)
-    for i, src in enumerate(media, 1):
-        relname = os.path.basename(src)
-        dst = os.path.join(gallery_dir, relname)
-        try:
-            hashv = hash_file(src)
-        except Exception:
-            hashv = ""
-        # Copy file
-        try:
-            from utils import copy_file
-            copy_file(src, dst)
-        except Exception as e:
-            log_warn(f"Copy failed for {src}: {e}")
-            continue
-        meta = _extract_exif(dst)
-        rows.append({"filename": relname, "sha256": hashv, **meta})
+    # Inode order: fewer seeks on HDD-backed sources; rows keep media order
+    results = _export_pipeline(media, gallery_dir, scan_backup(source).disk_order(media))
+    rows = [r for r in results if r is not None]
     write_csv(os.path.join(outdir, "photos.csv"), rows)
     write_json(os.path.join(outdir, "photos.json"), rows)
     write_html_table(os.path.join(outdir, "gallery.html"), "Photos (originals)", rows[:2000])
     log_ok(f"Photos exported: {len(rows)}")
-    return rows
\ No newline at end of file
+    return rows
@@ -1,6 +1,11 @@
 import os, json, glob
 from utils import ensure_dir, write_html_table, write_json, log_ok
 
+def _count_items(path: str) -> int:
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return len(data) if isinstance(data, list) else 1
+
 def build_report(source_exports_root: str, out_html_path: str):
     """
     source_exports_root should be the parent directory containing exported modules
@@ -21,9 +26,8 @@ def build_report(source_exports_root: str, out_html_path: str):
                 j = js[0]
         if os.path.exists(j):
             try:
-                data = json.load(open(j, "r", encoding="utf-8"))
-                count = len(data) if isinstance(data, list) else 1
-            except Exception:
+                count = _count_items(j)
+            except (OSError, ValueError):  # unreadable, not UTF-8, BOM or malformed
                 pass
         summary.append({"module": folder, "items": count if count is not None else "—", "path": full})
     write_json(out_html_path.replace(".html",".json"), summary)
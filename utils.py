@@ -1,12 +1,30 @@
 # utils.py — helpers for IO, time, html, csv, sqlite, logging
-import csv, json, os, sqlite3, sys, hashlib, shutil
+import csv, itertools, json, os, sqlite3, sys, hashlib, shutil
+from array import array
+from contextlib import closing
+from collections import defaultdict
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Iterable, Dict, Any, Optional, List
+from typing import Iterable, Iterator, Dict, Any, Optional, List, Sequence, Tuple
 from rich.console import Console
 from rich.table import Table
 from rich import box
 
+try:
+    import numpy as np  # optional: batch timestamp conversion
+except Exception:
+    np = None
+
+try:
+    import orjson  # optional: C JSON encoder for the indent=2 exports
+except Exception:
+    orjson = None
+
+try:
+    from pwalk import walk as pwalk_walk  # optional: multi-threaded os.walk drop-in
+except Exception:
+    pwalk_walk = None
+
 console = Console()
 
 def log_info(msg): console.log(f"[bold cyan]INFO[/]: {msg}")
@@ -18,25 +36,68 @@ def ensure_dir(path: str):
     Path(path).mkdir(parents=True, exist_ok=True)
     return str(Path(path).resolve())
 
-def write_csv(path: str, rows: Iterable[Dict[str, Any]]):
-    rows = list(rows)
-    if not rows:
-        with open(path, "w", newline="", encoding="utf-8") as f:
-            f.write("")
-        return 0
-    with open(path, "w", newline="", encoding="utf-8") as f:
-        w = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
-        w.writeheader()
-        w.writerows(rows)
-    return len(rows)
+def write_csv(path: str, rows: Iterable[Dict[str, Any]], fields: Optional[Sequence[str]] = None):
+    # Streams any iterable of dicts to a plain csv.writer as value lists
+    # (missing keys become ""). Columns are fields if given, else every key of
+    # a list's rows in first-seen order (rows may carry different keys, e.g.
+    # photo EXIF), else the first row's keys; as with DictWriter, a streamed
+    # row with a key outside the columns raises ValueError
+    if fields is None and isinstance(rows, list):
+        fields = list(dict.fromkeys(k for r in rows for k in r))
+    with open(path, "w", newline="", encoding="utf-8", buffering=1 << 20) as f:
+        it = iter(rows)
+        first = next(it, None)
+        if first is None:
+            return 0
+        keys = list(first.keys()) if fields is None else list(fields)
+        known = frozenset(keys)
+        w = csv.writer(f)
+        w.writerow(keys)
+        n = 0
+        for r in itertools.chain((first,), it):
+            if not known.issuperset(r.keys()):
+                raise ValueError(f"dict contains fields not in fieldnames: {sorted(map(str, r.keys() - known))}")
+            w.writerow([r.get(k, "") for k in keys])
+            n += 1
+    return n
+
+if orjson is not None:
+    # datetimes and dataclasses go through default=str, as with json
+    _ORJSON_OPTS = (orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+                    | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS)
+
+def _json_text(obj: Any) -> str:
+    # json.dumps(obj, ensure_ascii=False, indent=2, default=str), encoded by
+    # orjson when it's installed. Same layout; floats may spell exponents
+    # differently (1e16 vs 1e+16) and NaN becomes null. What orjson refuses
+    # (ints beyond 64 bits) goes through json
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, default=str, option=_ORJSON_OPTS).decode("utf-8")
+        except TypeError:
+            pass
+    return json.dumps(obj, ensure_ascii=False, indent=2, default=str)
 
 def write_json(path: str, obj: Any, indent=2):
     with open(path, "w", encoding="utf-8") as f:
-        json.dump(obj, f, ensure_ascii=False, indent=indent, default=str)
+        if indent == 2:
+            f.write(_json_text(obj))
+        else:
+            json.dump(obj, f, ensure_ascii=False, indent=indent, default=str)
+
+HTML_ESCAPE = str.maketrans({"&": "&amp;", "<": "&lt;", ">": "&gt;"})
+
+def _html_cell(v: Any) -> str:
+    return "" if v is None else str(v).translate(HTML_ESCAPE)
 
 def write_html_table(path: str, title: str, rows: List[Dict[str, Any]], brand=("#0b0b0b","#f5f5f5","#e20074","#05f2af")):
+    # Written fragment by fragment into a 1 MiB buffer (one string per row);
+    # cell text, headers and title are HTML-escaped
     bg, fg, mag, teal = brand
-    html = ["<!doctype html><meta charset='utf-8'>",
+    title = _html_cell(title)
+    with open(path, "w", encoding="utf-8", buffering=1 << 20) as f:
+        f.write("".join([
+            "<!doctype html><meta charset='utf-8'>",
             f"<title>{title}</title>",
             f"<style>body{{background:{bg};color:{fg};font:14px/1.5 -apple-system,Segoe UI,Arial,sans-serif;padding:24px}}",
             "h1{font-size:20px;margin:0 0 12px}",
@@ -44,29 +105,109 @@ def write_html_table(path: str, title: str, rows: List[Dict[str, Any]], brand=("
             "table{border-collapse:collapse;width:100%;margin-top:10px}",
             "th,td{border:1px solid #333;padding:8px;text-align:left}",
             f"a{{color:{teal}}}",
-            "</style>"]
-    html.append(f"<h1>{title}</h1>")
-    if not rows:
-        html.append("<p>No records.</p>")
-    else:
-        html.append("<table><thead><tr>")
-        for k in rows[0].keys():
-            html.append(f"<th>{k}</th>")
-        html.append("</tr></thead><tbody>")
+            "</style>",
+            f"<h1>{title}</h1>"]))
+        if not rows:
+            f.write("<p>No records.</p>")
+            return
+        f.write("<table><thead><tr>" + "".join(f"<th>{_html_cell(k)}</th>" for k in rows[0].keys())
+                + "</tr></thead><tbody>")
         for r in rows:
-            html.append("<tr>")
-            for v in r.values():
-                html.append(f"<td>{str(v) if v is not None else ''}</td>")
-            html.append("</tr>")
-        html.append("</tbody></table>")
+            f.write("<tr>" + "".join(f"<td>{_html_cell(v)}</td>" for v in r.values()) + "</tr>")
+        f.write("</tbody></table>")
+
+def _json_item(obj: Any) -> str:
+    # One element of an indent=2 top-level list, as json.dump would lay it out
+    return "  " + _json_text(obj).replace("\n", "\n  ")
+
+def write_json_iter(path: str, items: Iterable[Any]) -> int:
+    # write_json for a top-level list, written element by element so the list
+    # never has to exist; same bytes as write_json(path, list(items))
+    n = 0
     with open(path, "w", encoding="utf-8") as f:
-        f.write("".join(html))
+        f.write("[")
+        for item in items:
+            f.write(("\n" if n == 0 else ",\n") + _json_item(item))
+            n += 1
+        f.write("\n]" if n else "]")
+    return n
+
+def write_exports(outdir: str, stem: str, title: str, rows: Iterable[Any], html_limit: Optional[int] = 2000,
+                  fields: Optional[Sequence[str]] = None) -> int:
+    # <stem>.csv/.json/.html from one pass over any iterable of rows: CSV and JSON
+    # stream as rows arrive and only the HTML preview (first html_limit rows, all
+    # if None) is kept in memory. Same output as write_csv/write_json/write_html_table.
+    # With fields, rows are plain sequences in that column order (e.g. cursor
+    # tuples) and go to the CSV writer as-is; otherwise they are dicts.
+    ensure_dir(outdir)
+    preview: List[Dict[str, Any]] = []
+    n = 0
+    with open(os.path.join(outdir, f"{stem}.csv"), "w", newline="", encoding="utf-8") as fc, \
+         open(os.path.join(outdir, f"{stem}.json"), "w", encoding="utf-8") as fj:
+        w = None
+        fj.write("[")
+        for r in rows:
+            if fields is not None:
+                if w is None:
+                    w = csv.writer(fc)
+                    w.writerow(fields)
+                w.writerow(r)
+                r = dict(zip(fields, r))
+            else:
+                if w is None:
+                    keys = list(r.keys())
+                    w = csv.writer(fc)
+                    w.writerow(keys)
+                w.writerow([r.get(k, "") for k in keys])
+            fj.write(("\n" if n == 0 else ",\n") + _json_item(r))
+            if html_limit is None or n < html_limit:
+                preview.append(r)
+            n += 1
+        fj.write("\n]" if n else "]")
+    write_html_table(os.path.join(outdir, f"{stem}.html"), title, preview)
+    return n
+
+# Extractors only ever SELECT from backup databases: map up to 256 MiB of the
+# file, use a 64 MiB page cache, keep sorter/temp b-trees in RAM and refuse
+# any write on the connection
+SQLITE_READ_PRAGMAS = (
+    "PRAGMA mmap_size=268435456; PRAGMA cache_size=-65536; "
+    "PRAGMA temp_store=MEMORY; PRAGMA query_only=1; PRAGMA busy_timeout=5000;"
+)
+
+def sqlite_ro_uri(path: str) -> str:
+    # Percent-encoded file: URI (paths may hold '?', '#' or '%'). immutable=1 skips
+    # locking and change detection on backup copies, but it also makes SQLite
+    # ignore a -wal file, so a database with uncheckpointed WAL pages is only opened ro
+    uri = Path(os.path.abspath(path)).as_uri() + "?mode=ro"
+    if not os.path.exists(path + "-wal"):
+        uri += "&immutable=1"
+    return uri
 
 def open_sqlite(path: str) -> sqlite3.Connection:
-    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    conn = sqlite3.connect(sqlite_ro_uri(path), uri=True)
+    conn.executescript(SQLITE_READ_PRAGMAS)
     conn.row_factory = sqlite3.Row
     return conn
 
+def find_table(conn: sqlite3.Connection, names: Iterable[str]) -> Optional[str]:
+    # One parameterized sqlite_master lookup instead of probing each candidate
+    # (a count(*) probe scans the whole table); exception-free, and the first
+    # existing name in candidate order wins. NOCASE like SQLite's own name resolution
+    names = tuple(names)
+    if not names:
+        return None
+    marks = ",".join("?" * len(names))
+    rank = " ".join(f"WHEN ? THEN {i}" for i in range(len(names)))
+    row = conn.execute(
+        f"SELECT name FROM sqlite_master WHERE type='table' AND name COLLATE NOCASE IN ({marks}) "
+        f"ORDER BY CASE name COLLATE NOCASE {rank} END LIMIT 1",
+        names + names).fetchone()
+    return row[0] if row else None
+
+def table_exists(conn: sqlite3.Connection, name: str) -> bool:
+    return find_table(conn, (name,)) is not None
+
 APPLE_EPOCH = datetime(2001, 1, 1, tzinfo=timezone.utc)
 
 def apple_time_to_dt(ts: Optional[float]) -> Optional[datetime]:
@@ -84,11 +225,72 @@ def apple_time_to_dt(ts: Optional[float]) -> Optional[datetime]:
 def dt_to_iso(dt: Optional[datetime]) -> Optional[str]:
     return dt.astimezone(timezone.utc).isoformat() if dt else None
 
+_APPLE_EPOCH_UNIX_US = 978307200 * 10**6  # 2001-01-01 as microseconds since 1970
+_APPLE_MIN_US = (datetime.min.replace(tzinfo=timezone.utc) - APPLE_EPOCH) // timedelta(microseconds=1)
+_APPLE_MAX_US = (datetime.max.replace(tzinfo=timezone.utc) - APPLE_EPOCH) // timedelta(microseconds=1)
+
+def apple_times_to_iso(values: List[Any]) -> List[Optional[str]]:
+    # Batch form of dt_to_iso(apple_time_to_dt(v)): one vectorized NumPy pass per
+    # column instead of a datetime + timedelta per value. Same scale detection
+    # (ns / ms / s) and None for missing or out-of-range values; falls back to
+    # the scalar path without NumPy or on anything but int/float/None (NumPy
+    # would parse numeric str/bytes, which the scalar path rejects).
+    if np is None or not values or not all(v is None or isinstance(v, (int, float)) for v in values):
+        return [dt_to_iso(apple_time_to_dt(v)) for v in values]
+    try:
+        ts = np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+    except (OverflowError, TypeError, ValueError):
+        return [dt_to_iso(apple_time_to_dt(v)) for v in values]
+    secs = np.where(ts > 10**12, ts / 1e9, np.where(ts > 10**9, ts / 1e3, ts))
+    with np.errstate(invalid="ignore"):
+        # whole seconds + rounded fraction, the way timedelta(seconds=x) rounds
+        frac, whole = np.modf(secs)
+        ok = np.isfinite(secs) & (whole * 1e6 >= _APPLE_MIN_US) & (whole * 1e6 <= _APPLE_MAX_US)
+        us = whole[ok].astype(np.int64) * 10**6 + np.rint(frac[ok] * 1e6).astype(np.int64)
+    strs = np.datetime_as_string((us + _APPLE_EPOCH_UNIX_US).astype("datetime64[us]"), unit="us")
+    out: List[Optional[str]] = [None] * len(values)
+    for i, iso in zip(np.flatnonzero(ok).tolist(), strs.tolist()):
+        # isoformat() omits a zero fraction
+        out[i] = (iso[:-7] if iso.endswith(".000000") else iso) + "+00:00"
+    return out
+
+def _readahead(f):
+    # Ask the kernel to start reading the whole file now (Linux/POSIX only);
+    # overlaps disk latency with the hashing/copying that follows
+    if hasattr(os, "posix_fadvise"):
+        try:
+            os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_WILLNEED)
+        except OSError:
+            pass
+
+HASH_CHUNK = 4 << 20  # bytes per step; hashlib drops the GIL while hashing each one
+
+def _pump(f, h, out=None, head: int = 0) -> bytes:
+    # Feed an open binary file to hash h (and to file out), HASH_CHUNK at a
+    # time via readinto a reused buffer, and return its first head bytes.
+    # Source evidence is never mmapped: a read error on failing media must
+    # surface as OSError, not SIGBUS
+    _readahead(f)
+    buf = bytearray(HASH_CHUNK)
+    first = b""
+    with memoryview(buf) as view:
+        while True:
+            n = f.readinto(buf)
+            if not n:
+                break
+            h.update(view[:n])
+            if out is not None:
+                out.write(view[:n])
+            if len(first) < head:
+                first += view[:min(n, head - len(first))]
+    return first
+
 def hash_file(path: str, algo="sha256") -> str:
+    # OpenSSL's sha256 (SHA-NI where the CPU has it) in HASH_CHUNK steps, so
+    # concurrent callers hash on separate cores
     h = hashlib.new(algo)
-    with open(path, "rb") as f:
-        for chunk in iter(lambda: f.read(1024*1024), b""):
-            h.update(chunk)
+    with open(path, "rb", buffering=0) as f:
+        _pump(f, h)
     return h.hexdigest()
 
 def copy_file(src: str, dst: str) -> str:
@@ -96,14 +298,201 @@ def copy_file(src: str, dst: str) -> str:
     shutil.copy2(src, dst)
     return dst
 
+def copy_and_hash(src: str, dst: str, algo="sha256") -> str:
+    # copy_file(src, dst) + hash_file(src) from a single read of the source;
+    # returns the digest
+    return copy_hash_head(src, dst, 0, algo)[0]
+
+def copy_hash_head(src: str, dst: str, head: int, algo="sha256") -> Tuple[str, bytes]:
+    # copy_and_hash that also keeps the first head bytes of that same read
+    # (e.g. for header parsing), so nothing has to reopen the source
+    ensure_dir(os.path.dirname(dst))
+    h = hashlib.new(algo)
+    with open(src, "rb", buffering=0) as fi, open(dst, "wb") as fo:
+        first = _pump(fi, h, fo, head)
+    shutil.copystat(src, dst)
+    return h.hexdigest(), first
+
+def iter_files(root: str) -> Iterator[os.DirEntry]:
+    # Same top-down order as os.walk, but file/dir checks come from the
+    # DirEntry type cached by scandir, so there is no extra stat per entry
+    stack = [root]
+    while stack:
+        subdirs = []
+        try:
+            with os.scandir(stack.pop()) as it:
+                for e in it:
+                    try:
+                        if e.is_dir(follow_symlinks=False):
+                            subdirs.append(e.path)
+                        elif e.is_file():
+                            yield e
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+        stack.extend(reversed(subdirs))
+
+def find_first(root: str, names: Iterable[str], ignore_case: bool = False) -> Optional[str]:
+    # Stops at the first match instead of walking the rest of the backup;
+    # candidates are frozen once so each entry costs one hash lookup
+    if ignore_case:
+        targets = frozenset(n.lower() for n in names)
+        for e in iter_files(root):
+            if e.name.lower() in targets:
+                return e.path
+    else:
+        targets = frozenset(names)
+        for e in iter_files(root):
+            if e.name in targets:
+                return e.path
+    return None
+
 def walk_find(root: str, names: Iterable[str]) -> list:
-    names = set(n.lower() for n in names)
-    hits = []
-    for dirpath, _, filenames in os.walk(root):
-        for fn in filenames:
-            if fn.lower() in names:
-                hits.append(os.path.join(dirpath, fn))
-    return hits
+    return scan_backup(root).named(names, ignore_case=True)
+
+_TRACK_INODES = sys.platform.startswith("linux")
+
+def _walk_names(root: str) -> Iterator[Tuple[str, str, int]]:
+    # (path, basename, inode) of every file. pwalk reads directories on several
+    # threads, which pays off on HDD/NAS sources with millions of files; without
+    # it the scandir walker is used (its order is os.walk's). The inode comes
+    # free from d_ino on Linux; 0 where it would cost a stat
+    if pwalk_walk is not None:
+        join = os.path.join
+        for dirpath, _, filenames in pwalk_walk(root):
+            for fn in filenames:
+                yield join(dirpath, fn), fn, 0
+    elif _TRACK_INODES:
+        for e in iter_files(root):
+            yield e.path, e.name, e.inode()
+    else:
+        for e in iter_files(root):
+            yield e.path, e.name, 0
+
+def _ext(name: str) -> str:
+    # os.path.splitext(name)[1] for a bare file name (leading dots aren't an
+    # extension), without splitext's separator scans; the hot call of a scan
+    return "." + name.rpartition(".")[2] if "." in name.lstrip(".") else ""
+
+class BackupScan:
+    # One walk of a backup tree (iter_files order), indexed for the finders:
+    # lowercased basename -> positions, lowercased extension -> positions.
+    # Positions point into files, so merged lookups come back in walk order
+    __slots__ = ("root", "files", "inodes", "by_name", "by_ext", "_inode_of")
+
+    def __init__(self, root: str):
+        self.root = root
+        self.files: List[str] = []
+        self.inodes = array("Q")
+        by_name: Dict[str, List[int]] = defaultdict(list)
+        by_ext: Dict[str, List[int]] = defaultdict(list)
+        add, add_ino = self.files.append, self.inodes.append
+        for i, (path, name, ino) in enumerate(_walk_names(root)):
+            add(path)
+            add_ino(ino)
+            name = name.lower()
+            by_name[name].append(i)
+            by_ext[_ext(name)].append(i)
+        self.by_name, self.by_ext = dict(by_name), dict(by_ext)
+        self._inode_of: Optional[Dict[str, int]] = None
+
+    def disk_order(self, paths: Sequence[str]) -> List[int]:
+        # Indices into paths sorted by inode: on ext4/XFS that tracks on-disk
+        # placement, so reading in this order cuts seeks on spinning disks.
+        # Identity order where inodes weren't recorded
+        if not any(self.inodes):
+            return list(range(len(paths)))
+        if self._inode_of is None:
+            self._inode_of = dict(zip(self.files, self.inodes))
+        ino = self._inode_of
+        return sorted(range(len(paths)), key=lambda i: ino.get(paths[i], 0))
+
+    def _paths(self, index: Dict[str, List[int]], keys: Iterable[str]) -> List[str]:
+        hits = [index[k] for k in set(keys) if k in index]
+        if len(hits) == 1:
+            return [self.files[i] for i in hits[0]]
+        return [self.files[i] for i in sorted(i for h in hits for i in h)]
+
+    def named(self, names: Iterable[str], ignore_case: bool = False) -> List[str]:
+        names = frozenset(names)
+        paths = self._paths(self.by_name, (n.lower() for n in names))
+        if ignore_case:
+            return paths
+        return [p for p in paths if os.path.basename(p) in names]
+
+    def first(self, names: Iterable[str], ignore_case: bool = False) -> Optional[str]:
+        paths = self.named(names, ignore_case)
+        return paths[0] if paths else None
+
+    def first_of(self, names: Iterable[str]) -> Dict[str, str]:
+        # {name: first path (walk order) with exactly that basename} for the
+        # names present; one dict probe per name
+        found = {}
+        for n in set(names):
+            for i in self.by_name.get(n.lower(), ()):
+                p = self.files[i]
+                if os.path.basename(p) == n:
+                    found[n] = p
+                    break
+        return found
+
+    def with_ext(self, exts: Iterable[str]) -> List[str]:
+        return self._paths(self.by_ext, (x.lower() for x in exts))
+
+_SCANS: Dict[str, BackupScan] = {}
+
+def scan_backup(source: str, refresh: bool = False) -> BackupScan:
+    # Walk a source once per process; every finder after that is a dict lookup
+    key = os.path.abspath(source)
+    if refresh or key not in _SCANS:
+        _SCANS[key] = BackupScan(source)
+    return _SCANS[key]
+
+def find_in_backup(source: str, names: Iterable[str], ignore_case: bool = False) -> Optional[str]:
+    # Served from the shared scan if something already walked this source;
+    # otherwise an early-exit walk is cheaper than indexing the whole tree
+    scan = _SCANS.get(os.path.abspath(source))
+    if scan is not None:
+        return scan.first(names, ignore_case)
+    return find_first(source, names, ignore_case)
+
+SQLITE_MAGIC = b"SQLite format 3\x00"
+
+def _is_sqlite(path: str) -> bool:
+    try:
+        with open(path, "rb") as f:
+            return f.read(len(SQLITE_MAGIC)) == SQLITE_MAGIC
+    except OSError:
+        return False
+
+def find_backup_file(source: str, domain: str, relative_path: str, sqlite: bool = False) -> Optional[str]:
+    # Path of one backed-up file without walking: Manifest.db maps
+    # (domain, relativePath) to its fileID. Without a readable Manifest.db
+    # (older or encrypted backups) the fileID is derived the way iOS names it,
+    # SHA1("<domain>-<relativePath>"). Files sit in <source>/<id[:2]>/<id>
+    # (iOS 10+) or flat in <source>; None if there is no such file. With
+    # sqlite, a file that isn't a plain SQLite database (e.g. an encrypted
+    # backup's blob) counts as not found too
+    file_id = None
+    manifest = os.path.join(source, "Manifest.db")
+    try:
+        if os.path.isfile(manifest):
+            with closing(open_sqlite(manifest)) as conn:
+                row = conn.execute(
+                    "SELECT fileID FROM Files WHERE domain = ? AND relativePath = ? LIMIT 1",
+                    (domain, relative_path)).fetchone()
+            if row is None:
+                return None
+            file_id = row[0]
+    except sqlite3.Error:
+        pass
+    if file_id is None:
+        file_id = hashlib.sha1(f"{domain}-{relative_path}".encode("utf-8")).hexdigest()
+    for p in (os.path.join(source, file_id[:2], file_id), os.path.join(source, file_id)):
+        if os.path.isfile(p):
+            return p if not sqlite or _is_sqlite(p) else None
+    return None
 
 def table_print(title: str, rows: List[dict], limit: int = 10):
     table = Table(title=title, box=box.MINIMAL_DOUBLE_HEAD)